@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Execute the benchmarks of the session lifecycle.
+
+By default a fake GRASS installation is used, so the benchmarks can be executed
+without GRASS GIS; set the ``GRASSBIN`` variable to benchmark a real
+installation. The results are saved as JSON and can be compared with a
+previous run to spot regressions::
+
+    $ python benchmarks/run.py --save .benchmarks/baseline.json
+    $ python benchmarks/run.py --compare .benchmarks/baseline.json
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+from suite import BENCHMARKS, Context
+
+from grass_session.testing import make_fake_grass
+
+
+def measure(func, repeat, warmup=1):
+    """Return a dictionary with the statistics of the execution times."""
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeat):
+        start = time.time()
+        elapsed = func()
+        if not getattr(func, "self_timed", False):
+            elapsed = time.time() - start
+        timings.append(elapsed)
+    timings.sort()
+    return dict(
+        repeat=repeat,
+        min=timings[0],
+        median=timings[len(timings) // 2],
+        mean=sum(timings) / len(timings),
+        max=timings[-1],
+    )
+
+
+def compare(results, baseline, threshold):
+    """Print the ratio between the median times and return the list of
+    benchmarks that are slower than the baseline more than `threshold`."""
+    regressions = []
+    for name, stats in results.items():
+        if name not in baseline:
+            continue
+        ratio = stats["median"] / baseline[name]["median"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = " REGRESSION"
+            regressions.append(name)
+        print("{:>24}: {:6.2f}x baseline{}".format(name, ratio, flag))
+    return regressions
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("-k", "--select", default="", help="run only matching")
+    parser.add_argument("--save", help="path of the JSON file with the results")
+    parser.add_argument("--compare", help="JSON file with the baseline results")
+    parser.add_argument(
+        "--threshold", type=float, default=0.25, help="tolerated slowdown"
+    )
+    opts = parser.parse_args(args)
+
+    tmpdir = tempfile.mkdtemp()
+    # do not use/pollute the user cache
+    os.environ["GRASS_SESSION_CACHE_DIR"] = os.path.join(tmpdir, "cache")
+    results = {}
+    try:
+        grassbin = os.environ.get("GRASSBIN")
+        if not grassbin:
+            grassbin = make_fake_grass(os.path.join(tmpdir, "fakegrass")).grassbin
+        ctx = Context(tmpdir, grassbin)
+        for name, setup in BENCHMARKS.items():
+            if opts.select not in name:
+                continue
+            results[name] = stats = measure(setup(ctx), opts.repeat)
+            print(
+                "{:>24}: median {:9.3f} ms, min {:9.3f} ms".format(
+                    name, stats["median"] * 1000, stats["min"] * 1000
+                )
+            )
+    finally:
+        shutil.rmtree(tmpdir)
+
+    if opts.save:
+        if os.path.dirname(opts.save) and not os.path.isdir(
+            os.path.dirname(opts.save)
+        ):
+            os.makedirs(os.path.dirname(opts.save))
+        with open(opts.save, "w") as fjson:
+            json.dump(
+                dict(
+                    machine=platform.node(),
+                    python=platform.python_version(),
+                    grassbin=os.environ.get("GRASSBIN", "fake"),
+                    time=time.time(),
+                    results=results,
+                ),
+                fjson,
+                indent=1,
+                sort_keys=True,
+            )
+    if opts.compare:
+        with open(opts.compare) as fjson:
+            baseline = json.load(fjson)["results"]
+        if compare(results, baseline, opts.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Definition of the benchmarks executed by ``benchmarks/run.py``.
+
+Each benchmark is a function receiving a `Context` and returning the
+callable to be measured; the callable is executed many times, so it must
+create new names for the objects that it creates. A callable marked with
+`self_timed` returns the measured time itself (e.g. a time measured in a
+child process), otherwise the whole call is measured.
+"""
+import glob
+import itertools
+import os
+import shutil
+import subprocess
+import sys
+import sysconfig
+from collections import OrderedDict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("GRASS_SESSION_LAZY", "1")
+
+from grass_session import Session, TmpSession, grass_create  # noqa: E402
+from grass_session.executor import create_mapsets  # noqa: E402
+
+BENCHMARKS = OrderedDict()
+
+
+def benchmark(func):
+    """Register a benchmark."""
+    BENCHMARKS[func.__name__] = func
+    return func
+
+
+def self_timed(func):
+    """Mark a callable returning its own measured time."""
+    func.self_timed = True
+    return func
+
+
+class Context(object):
+    def __init__(self, tmpdir, grassbin):
+        """Shared data of the benchmarks: a temporary directory, the GRASS
+        launcher and a location with the PERMANENT mapset."""
+        self.tmpdir = tmpdir
+        self.grassbin = grassbin
+        self.gisdb = os.path.join(tmpdir, "gisdb")
+        os.mkdir(self.gisdb)
+        self.location = "location"
+        grass_create(grassbin, os.path.join(self.gisdb, self.location), "XY")
+        self._counter = itertools.count()
+
+    def name(self, prefix):
+        """Return a new unique name."""
+        return "{}_{}".format(prefix, next(self._counter))
+
+
+def _import(ctx, lazy):
+    env = dict(os.environ, GRASS_SESSION_LAZY=lazy, GRASS_SESSION_NO_CACHE="1")
+    env["GRASSBIN"] = ctx.grassbin
+    env["PYTHONPATH"] = ROOT
+    cmd = [sys.executable, "-c", "import grass_session"]
+    return lambda: subprocess.check_call(cmd, env=env)
+
+
+@benchmark
+def import_eager(ctx):
+    return _import(ctx, "0")
+
+
+@benchmark
+def import_lazy(ctx):
+    return _import(ctx, "1")
+
+
+@benchmark
+def session_init(ctx):
+    return lambda: Session(grassbin=ctx.grassbin, isolated=True)
+
+
+@benchmark
+def session_open_close(ctx):
+    sess = Session(grassbin=ctx.grassbin, isolated=True)
+
+    def open_close():
+        sess.open(ctx.gisdb, ctx.location)
+        sess.close()
+
+    return open_close
+
+
+@benchmark
+def create_location(ctx):
+    return lambda: grass_create(
+        ctx.grassbin, os.path.join(ctx.gisdb, ctx.name("location")), "XY"
+    )
+
+
+def _create_mapset(ctx, native):
+    def create():
+        path = os.path.join(ctx.gisdb, ctx.location, ctx.name("mapset"))
+        grass_create(ctx.grassbin, path, "", native=native)
+
+    return create
+
+
+@benchmark
+def create_mapset_launcher(ctx):
+    return _create_mapset(ctx, native=False)
+
+
+@benchmark
+def create_mapset_native(ctx):
+    return _create_mapset(ctx, native=True)
+
+
+@benchmark
+def create_mapsets_batch(ctx):
+    """Create 20 mapsets with `create_mapsets`."""
+
+    def create():
+        names = [ctx.name("batch") for _ in range(20)]
+        create_mapsets(ctx.gisdb, ctx.location, names)
+
+    return create
+
+
+@benchmark
+def tmpsession_mapset(ctx):
+    def tmpsession():
+        with TmpSession(
+            grassbin=ctx.grassbin,
+            gisdb=ctx.gisdb,
+            location=ctx.location,
+            mapset=ctx.name("tmp"),
+            create_opts="",
+            isolated=True,
+        ):
+            pass
+
+    return tmpsession
+
+
+LOAD_LIBS = """
+import sys, time
+from grass_session import libs
+start = time.time()
+libs.load_libs(sys.argv[1])
+print(time.time() - start)
+"""
+
+
+@benchmark
+def load_libs(ctx):
+    """Load a copy of the python extension modules as GRASS libraries.
+
+    The libraries are loaded in a new process, a library already loaded by
+    the process would not be loaded again."""
+    gisbase = os.path.join(ctx.tmpdir, "libs")
+    os.makedirs(os.path.join(gisbase, "lib"))
+    dynload = sysconfig.get_config_var("DESTSHARED") or ""
+    for i, lib in enumerate(sorted(glob.glob(os.path.join(dynload, "*.so")))[:20]):
+        shutil.copy(lib, os.path.join(gisbase, "lib", "libgrass_{}.so".format(i)))
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    cmd = [sys.executable, "-c", LOAD_LIBS, gisbase]
+    return self_timed(lambda: float(subprocess.check_output(cmd, env=env)))
@@ -1,19 +1,64 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+import sys
+from importlib import import_module
 
+from grass_session import session as _session
 from grass_session.session import (
-    GISBASE,
-    GRASSBIN,
     Session,
     TmpSession,
     clean_grass_path_env,
+    clear_grass_gisbase_cache,
+    create_mapset,
     get_grass_bin,
     get_grass_gisbase,
     get_platform_name,
     grass_create,
     grass_init,
+    is_lazy,
+    isolated_env,
+    make_command,
     set_grass_path_env,
     write_gisrc,
 )
 
+# names imported from their module the first time that they are accessed
+_LAZY = {
+    "AsyncSession": "grass_session.aio",
+    "create_mapsets": "grass_session.executor",
+    "map_over_mapsets": "grass_session.executor",
+    "GisDB": "grass_session.gisdb",
+    "MapsetLock": "grass_session.lock",
+    "MapsetLockError": "grass_session.lock",
+    "SessionPool": "grass_session.pool",
+    "GrassRegistry": "grass_session.registry",
+    "get_registry": "grass_session.registry",
+    "LocationTemplates": "grass_session.templates",
+    "Timings": "grass_session.timing",
+    "add_timing_hook": "grass_session.timing",
+    "remove_timing_hook": "grass_session.timing",
+}
+
+if not is_lazy():
+    from grass_session.session import GISBASE, GRASSBIN
+
+if sys.version_info < (3, 7):
+    # module __getattr__ is not supported, import the names now
+    for _name, _module in _LAZY.items():
+        if _name != "AsyncSession":
+            globals()[_name] = getattr(import_module(_module), _name)
+
+
+def __getattr__(name):
+    # resolve GRASSBIN and GISBASE on demand (only Python >= 3.7), reading
+    # them does not modify os.environ
+    if name in ("GRASSBIN", "GISBASE"):
+        return getattr(_session, name)
+    if name in _LAZY:
+        value = getattr(import_module(_LAZY[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
 version = "0.5"
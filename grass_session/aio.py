@@ -0,0 +1,238 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+asyncio API to discover GRASS, create locations/mapsets and run modules
+without blocking the event loop (only Python >= 3.5).
+"""
+import asyncio
+import multiprocessing
+import os
+import shlex
+import weakref
+
+from grass_session import session, timing
+from grass_session.env import EnvSnapshot
+from grass_session.session import (
+    can_create_mapset,
+    create_mapset,
+    get_grass_bin,
+    grass_env_diff,
+    grass_init,
+    isolated_env,
+    make_command,
+)
+
+DEFAULT_LIMIT = multiprocessing.cpu_count()
+
+# event loop => semaphore limiting the number of processes
+_SEMAPHORES = weakref.WeakKeyDictionary()
+# launcher key => task discovering the GISBASE
+_DISCOVERIES = {}
+
+
+def get_semaphore(limit=None):
+    """Return the default semaphore of the running event loop, limiting the
+    number of GRASS processes executed at the same time."""
+    get_loop = getattr(asyncio, "get_running_loop", asyncio.get_event_loop)
+    loop = get_loop()
+    if loop not in _SEMAPHORES:
+        _SEMAPHORES[loop] = asyncio.Semaphore(limit or DEFAULT_LIMIT)
+    return _SEMAPHORES[loop]
+
+
+async def run_process(args, env=None, semaphore=None):
+    """Execute a process and return the return code, the standard output
+    and the standard error."""
+    semaphore = get_semaphore() if semaphore is None else semaphore
+    async with semaphore:
+        timing.count_subprocess()
+        proc = await asyncio.create_subprocess_exec(
+            *args,
+            env=env,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        out, err = await proc.communicate()
+    return proc.returncode, out, err
+
+
+async def get_grass_gisbase(grassbin=None, semaphore=None):
+    """Return the GRASS GISBASE path, see `session.get_grass_gisbase`.
+
+    Concurrent calls for the same launcher share the same process."""
+    grassbin = str(get_grass_bin() if grassbin is None else grassbin)
+    key = session._discovery_key(grassbin)
+    if key is None:
+        return await _grass_config_path(grassbin, key, semaphore)
+    gisbase = session._get_cached_gisbase(key)
+    if gisbase is not None:
+        return gisbase
+
+    task = _DISCOVERIES.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_grass_config_path(grassbin, key, semaphore))
+        _DISCOVERIES[key] = task
+        task.add_done_callback(lambda _: _DISCOVERIES.pop(key, None))
+    return await asyncio.shield(task)
+
+
+async def _grass_config_path(grassbin, key, semaphore):
+    """Execute the GRASS launcher and return the GISBASE path"""
+    code, out, err = await run_process(
+        [grassbin, "--config", "path"], env=session.ORIGINAL_ENV, semaphore=semaphore
+    )
+    gisbase = out.decode().strip()
+    if code != 0 or not os.path.exists(gisbase):
+        raise RuntimeError(
+            (
+                "Cannot find GRASS GIS start script: {grassbin}, "
+                "set the right one using the GRASSBIN environm. "
+                "variable. GRASS said:\n{err}"
+            ).format(grassbin=grassbin, err=err.decode())
+        )
+    if key is not None:
+        session._set_cached_gisbase(key, gisbase)
+    return gisbase
+
+
+async def grass_create(grassbin, path, create_opts, native=True, semaphore=None):
+    """Create a new location/mapset, see `session.grass_create`."""
+    if native and create_opts == "" and can_create_mapset(path):
+        create_mapset(path)
+        return
+    args = [str(grassbin), "-c"] + shlex.split(create_opts) + ["-e", str(path)]
+    code, out, err = await run_process(
+        args, env=session.ORIGINAL_ENV, semaphore=semaphore
+    )
+    if code != 0:
+        raise RuntimeError(
+            "Cannot create: {path} with the following "
+            "options: {create_opts}. Executing:\n{cmd}\n"
+            "GRASS said:\n"
+            "{out}\n{err}".format(
+                path=path,
+                create_opts=create_opts,
+                cmd=" ".join(args),
+                out=out.decode(),
+                err=err.decode(),
+            )
+        )
+
+
+class AsyncSession(object):
+    def __init__(
+        self,
+        gisdb=None,
+        location=None,
+        mapset=None,
+        create_opts=None,
+        grassversion=None,
+        grassbin=None,
+        env=None,
+        semaphore=None,
+    ):
+        """Create a GRASS GIS session for asyncio applications.
+
+        The session always uses a private environment, the processes are
+        executed with ``asyncio.create_subprocess_exec`` and the number of
+        processes executed at the same time is limited by `semaphore` (by
+        default a semaphore shared by all the sessions of the event loop,
+        see `get_semaphore`).
+
+        Examples
+        --------
+        >>> async def info(mapset):
+        ...     async with AsyncSession(gisdb=TMPDIR, location="loc",
+        ...                             mapset=mapset, create_opts="") as sess:
+        ...         return await sess.read_command("g.region", flags="g")
+        >>> async def main():
+        ...     return await asyncio.gather(*[info("m%d" % i)
+        ...                                   for i in range(100)])
+        >>> regions = asyncio.run(main())
+        """
+        self.gisdb, self.location, self.mapset = gisdb, location, mapset
+        self.create_opts = create_opts
+        self.grassversion = grassversion
+        self.grassbin = grassbin
+        self.gisbase = None
+        self.env = isolated_env() if env is None else env
+        self.semaphore = semaphore
+        self._env_snapshot = self._open_snapshot = self._gisrc = None
+
+    async def open(self, gisdb=None, location=None, mapset=None, create_opts=None):
+        """Open or create GRASS GIS mapset, the parameters are documented in
+        `Session.open()`."""
+        try:
+            return await self._open(gisdb, location, mapset, create_opts)
+        except Exception:
+            await self.close()
+            raise
+
+    async def _open(self, gisdb, location, mapset, create_opts):
+        gisdb = self.gisdb if gisdb is None else gisdb
+        location = self.location if location is None else location
+        mapset = self.mapset if mapset is None else mapset
+        mapset = "PERMANENT" if mapset is None else mapset
+        create_opts = self.create_opts if create_opts is None else create_opts
+        if self.grassbin is None:
+            self.grassbin = get_grass_bin(version=self.grassversion)
+        self.gisbase = await get_grass_gisbase(self.grassbin, self.semaphore)
+        if self._env_snapshot is None:
+            # sys.path is shared by the process, its entries are reference
+            # counted by the snapshots
+            diff = grass_env_diff(gisbase=self.gisbase, env=self.env)
+            self._env_snapshot = diff.apply(self.env)
+
+        lpath = os.path.join(str(gisdb), str(location))
+        if create_opts is not None:
+            if mapset == "PERMANENT" and not os.path.exists(lpath):
+                path = lpath
+            else:
+                path = os.path.join(lpath, mapset)
+            await grass_create(
+                self.grassbin, path, create_opts, semaphore=self.semaphore
+            )
+        self.gisdb, self.location, self.mapset = gisdb, location, mapset
+        self._open_snapshot = EnvSnapshot(self.env, ("GIS_LOCK", "GISDBASE", "GISRC"))
+        env = grass_init(self.gisbase, gisdb, location, mapset, env=self.env)
+        self._open_snapshot.record_applied()
+        self._gisrc = env["GISRC"]
+        return env
+
+    async def close(self):
+        """Close the session, the environment and ``sys.path`` are restored as
+        they were before the session."""
+        if self._open_snapshot is not None:
+            snapshot, self._open_snapshot = self._open_snapshot, None
+            gisrc, self._gisrc = self._gisrc, None
+            if gisrc and os.path.exists(gisrc):
+                os.remove(gisrc)
+            snapshot.restore()
+        if self._env_snapshot is not None:
+            self._env_snapshot.restore()
+            self._env_snapshot = None
+
+    async def read_command(self, module, **kwargs):
+        """Execute a GRASS module and return its standard output as string,
+        the arguments are converted with `make_command`."""
+        cmd = make_command(module, **kwargs)
+        code, out, err = await run_process(cmd, env=self.env, semaphore=self.semaphore)
+        if code != 0:
+            raise RuntimeError(
+                "Module {cmd} returned {code}, GRASS said:\n{err}".format(
+                    cmd=" ".join(cmd), code=code, err=err.decode()
+                )
+            )
+        return out.decode()
+
+    async def run_command(self, module, **kwargs):
+        """Execute a GRASS module, raise a RuntimeError if the module fails."""
+        await self.read_command(module, **kwargs)
+        return 0
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
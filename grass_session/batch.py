@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Execute a chain of GRASS modules through one shell script.
+
+The calls are recorded and written in a ``sh`` script executed once with the
+session environment: the modules are still separate executables, but the
+chain pays a single process start from Python and the standard output, the
+standard error and the exit code of each module are collected from files.
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile as tmpfile
+
+from grass_session import timing
+from grass_session.session import make_command
+
+try:
+    from shlex import quote
+except ImportError:  # Python 2
+    from pipes import quote
+
+
+class BatchStep(object):
+    def __init__(self, cmd):
+        """A module of the batch, `returncode` is None until the module is
+        executed."""
+        self.cmd = cmd
+        self.returncode = None
+        self.stdout = None
+        self.stderr = None
+
+    @property
+    def executed(self):
+        return self.returncode is not None
+
+    def __repr__(self):
+        return "BatchStep({!r}, returncode={!r})".format(
+            " ".join(self.cmd), self.returncode
+        )
+
+
+class Batch(object):
+    def __init__(self, sess, stop_on_error=True, encoding="utf-8"):
+        """Record module calls and execute them with a single shell script.
+
+        Parameters
+        ----------
+        sess : Session
+            An opened session
+        stop_on_error : bool
+            Stop at the first module returning a non-zero exit code
+        encoding : string
+            Encoding of the module outputs
+        """
+        self.sess = sess
+        self.stop_on_error = stop_on_error
+        self.encoding = encoding
+        self.steps = []
+
+    def run_command(self, module, **kwargs):
+        """Add a module to the batch and return its `BatchStep`, the arguments
+        are converted with `make_command`."""
+        step = BatchStep(make_command(module, **kwargs))
+        self.steps.append(step)
+        return step
+
+    def script(self, tmpdir):
+        """Return the shell script executing the steps, the outputs are
+        written in `tmpdir`."""
+        lines = ["#!/bin/sh"]
+        for index, step in enumerate(self.steps):
+            path = os.path.join(tmpdir, str(index))
+            lines.append(
+                "{cmd} > {out} 2> {err}".format(
+                    cmd=" ".join(quote(arg) for arg in step.cmd),
+                    out=quote(path + ".out"),
+                    err=quote(path + ".err"),
+                )
+            )
+            lines.append("rc=$?")
+            lines.append("echo $rc > {}".format(quote(path + ".rc")))
+            if self.stop_on_error:
+                lines.append('[ "$rc" -eq 0 ] || exit "$rc"')
+        lines.append("exit 0")
+        return "\n".join(lines) + "\n"
+
+    def _read(self, path):
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as fl:
+            return fl.read()
+
+    def execute(self):
+        """Execute the recorded steps and return them, the steps not executed
+        because of a previous error keep ``returncode=None``."""
+        if not self.steps:
+            return []
+        tmpdir = tmpfile.mkdtemp(prefix="batch-", dir=self.sess.get_tmpdir())
+        try:
+            script = os.path.join(tmpdir, "batch.sh")
+            with open(script, "w") as fl:
+                fl.write(self.script(tmpdir))
+            if sys.platform == "win32":
+                shell = self.sess.env.get("GRASS_SH", "sh")
+            else:
+                shell = "/bin/sh"
+            timing.count_subprocess()
+            subprocess.call([shell, script], env=self.sess.env)
+            for index, step in enumerate(self.steps):
+                path = os.path.join(tmpdir, str(index))
+                returncode = self._read(path + ".rc")
+                if returncode is None:
+                    continue
+                step.returncode = int(returncode)
+                step.stdout = self._read(path + ".out").decode(self.encoding)
+                step.stderr = self._read(path + ".err").decode(self.encoding)
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+        return self.steps
+
+    def check(self):
+        """Raise a RuntimeError if a step failed."""
+        for step in self.steps:
+            if step.returncode:
+                raise RuntimeError(
+                    "Module {cmd} returned {code}, GRASS said:\n{err}".format(
+                        cmd=" ".join(step.cmd), code=step.returncode, err=step.stderr
+                    )
+                )
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Helpers to persist data in the user cache directory.
+
+The cache directory can be changed through the ``GRASS_SESSION_CACHE_DIR``
+environmental variable and the persistent cache can be disabled setting
+``GRASS_SESSION_NO_CACHE`` to a true value.
+"""
+import json
+import os
+import sys
+import tempfile as tmpfile
+
+CACHE_DIRNAME = "grass-session"
+
+
+def is_cache_enabled():
+    """Return False if the persistent cache has been disabled by the user."""
+    nocache = os.environ.get("GRASS_SESSION_NO_CACHE", "")
+    return nocache.strip().lower() not in ("1", "true", "yes", "on")
+
+
+def get_cache_dir():
+    """Return the path to the directory used to store the cached data."""
+    cache_dir = os.environ.get("GRASS_SESSION_CACHE_DIR")
+    if cache_dir:
+        return cache_dir
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA", os.path.expanduser("~"))
+    elif sys.platform == "darwin":
+        base = os.path.join(os.path.expanduser("~"), "Library", "Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+            os.path.expanduser("~"), ".cache"
+        )
+    return os.path.join(base, CACHE_DIRNAME)
+
+
+def get_cache_path(*names):
+    """Return the path of a file/directory inside the cache directory."""
+    return os.path.join(get_cache_dir(), *names)
+
+
+def read_json(name, default=None):
+    """Return the content of a JSON file stored in the cache directory,
+    return ``default`` if the file is missing or is not readable."""
+    try:
+        with open(get_cache_path(name), "r") as fjson:
+            return json.load(fjson)
+    except (IOError, OSError, ValueError):
+        return default
+
+
+def write_json(name, data):
+    """Write atomically a JSON file in the cache directory, return False if the
+    file cannot be written."""
+    path = get_cache_path(name)
+    try:
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        fd, tmp = tmpfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        with os.fdopen(fd, "w") as fjson:
+            json.dump(data, fjson, indent=1, sort_keys=True)
+        # os.rename is not atomic on Windows if the destination exists
+        replace = getattr(os, "replace", os.rename)
+        replace(tmp, path)
+    except (IOError, OSError):
+        return False
+    return True
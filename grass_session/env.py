@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Apply a set of changes to an environment and to ``sys.path`` and undo them.
+
+The changes are kept as a structured diff: the scalar variables to set and
+the entries to add to the path-list variables (``PATH``,
+``LD_LIBRARY_PATH``, ...). Applying the diff returns a snapshot with the
+previous values, restoring the snapshot puts back exactly the previous
+values.
+
+The entries added to ``sys.path`` are shared by all the snapshots of the
+process: an entry is removed only when the last snapshot using it is
+restored and only if it was not in ``sys.path`` before.
+
+The snapshots can be restored in any order: a snapshot restored before a
+later snapshot of the same environment hands its saved values over to it,
+so the variables of the later snapshot stay in place until it is restored.
+"""
+import os
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+
+PATH_VARIABLES = ("PATH", "LD_LIBRARY_PATH", "DYLD_LIBRARY_PATH", "PYTHONPATH")
+
+# sys.path entry => [number of snapshots using it, True if added by a snapshot]
+_SYSPATH = {}
+_SYSPATH_LOCK = threading.Lock()
+
+# weak references to the snapshots not restored yet, in creation order
+_LIVE = []
+_LIVE_LOCK = threading.Lock()
+
+
+def _acquire_syspath(paths):
+    with _SYSPATH_LOCK:
+        for path in reversed(paths):
+            ref = _SYSPATH.get(path)
+            if ref is None:
+                ref = _SYSPATH[path] = [0, path not in sys.path]
+                if ref[1]:
+                    sys.path.insert(0, path)
+            ref[0] += 1
+
+
+def _release_syspath(paths):
+    with _SYSPATH_LOCK:
+        for path in paths:
+            ref = _SYSPATH.get(path)
+            if ref is None:
+                continue
+            ref[0] -= 1
+            if ref[0] == 0:
+                del _SYSPATH[path]
+                if ref[1] and path in sys.path:
+                    sys.path.remove(path)
+
+
+def split_paths(value):
+    """Return the list of the non-empty entries of a path-list value."""
+    return [path for path in (value or "").split(os.pathsep) if path]
+
+
+def merge_paths(value, entries, prepend=False, exclude=()):
+    """Append the missing `entries` to a path-list value, the existing value
+    is kept as it is. With `prepend` the `entries` are moved at the
+    beginning, the entries in `exclude` are removed."""
+    if prepend or exclude:
+        exclude = set(exclude) - set(entries)
+        entries = list(OrderedDict.fromkeys(entries))
+        known = set(entries)
+        rest = [
+            path
+            for path in split_paths(value)
+            if path not in known and path not in exclude
+        ]
+        return os.pathsep.join(entries + rest if prepend else rest + entries)
+    known = set(split_paths(value))
+    missing = []
+    for entry in entries:
+        if entry not in known:
+            missing.append(entry)
+            known.add(entry)
+    return os.pathsep.join(([value] if value else []) + missing)
+
+
+class EnvDiff(object):
+    def __init__(self, variables=None, paths=None, syspath=None):
+        """Changes of an environment.
+
+        Parameters
+        ----------
+        variables : dict
+            Variables to set
+        paths : dict
+            Path-list variable => list of the entries to append
+        syspath : list
+            Entries to insert at the beginning of ``sys.path``
+        """
+        self.variables = OrderedDict(variables or {})
+        self.paths = OrderedDict(
+            (key, list(OrderedDict.fromkeys(entries)))
+            for key, entries in (paths or {}).items()
+        )
+        self.syspath = list(OrderedDict.fromkeys(syspath or []))
+
+    @classmethod
+    def from_envs(cls, before, after, syspath=None):
+        """Return the diff transforming the `before` environment in `after`,
+        the removed variables are ignored."""
+        variables, paths = OrderedDict(), OrderedDict()
+        for key, value in after.items():
+            if before.get(key) == value:
+                continue
+            if key in PATH_VARIABLES:
+                old = set(split_paths(before.get(key)))
+                paths[key] = [path for path in split_paths(value) if path not in old]
+            else:
+                variables[key] = value
+        return cls(variables=variables, paths=paths, syspath=syspath)
+
+    def apply(self, env=None, syspath=True, prepend=False, exclude=None):
+        """Apply the changes to `env` (by default ``os.environ``) and to
+        ``sys.path``, return an `EnvSnapshot` to undo them.
+
+        With `prepend` the entries of the path-lists take the precedence over
+        the existing ones, `exclude` is a dictionary path-list variable =>
+        entries to remove (e.g. the paths of another GRASS installation)."""
+        env = os.environ if env is None else env
+        exclude = exclude or {}
+        paths = list(self.paths) + [key for key in exclude if key not in self.paths]
+        snapshot = EnvSnapshot(env, list(self.variables) + paths, syspath=syspath)
+        for key, value in self.variables.items():
+            env[key] = value
+        for key in paths:
+            entries = self.paths.get(key, [])
+            if key in env or entries:
+                env[key] = merge_paths(
+                    env.get(key), entries, prepend=prepend, exclude=exclude.get(key, ())
+                )
+        if syspath:
+            _acquire_syspath(self.syspath)
+            snapshot.syspath_added = list(self.syspath)
+        snapshot.record_applied()
+        return snapshot
+
+    def remove(self, env=None):
+        """Remove the entries of the path-list variables from `env`, the
+        other variables and ``sys.path`` are not modified."""
+        env = os.environ if env is None else env
+        for key, entries in self.paths.items():
+            if key in env:
+                entries = set(entries)
+                env[key] = os.pathsep.join(
+                    path for path in env[key].split(os.pathsep) if path not in entries
+                )
+        return env
+
+    def __repr__(self):
+        return "EnvDiff(variables={!r}, paths={!r}, syspath={!r})".format(
+            dict(self.variables), dict(self.paths), self.syspath
+        )
+
+
+class EnvSnapshot(object):
+    def __init__(self, env, keys, syspath=True):
+        """Save the values of `keys` in `env` (None for the missing ones)."""
+        self.env = env
+        self.saved = OrderedDict((key, env.get(key)) for key in keys)
+        self.syspath = syspath
+        self.syspath_added = []
+        self.applied = {}
+        self.restored = False
+        with _LIVE_LOCK:
+            _LIVE.append(weakref.ref(self))
+
+    def record_applied(self):
+        """Record the current values of the saved variables as the values
+        set by the changes."""
+        self.applied = dict(
+            (key, self.env[key]) for key in self.saved if key in self.env
+        )
+
+    def _unregister(self):
+        """Remove the snapshot from the live ones and return the later
+        snapshots of the same environment."""
+        later, found = [], False
+        for ref in list(_LIVE):
+            snapshot = ref()
+            if snapshot is None or snapshot is self:
+                _LIVE.remove(ref)
+                found = found or snapshot is self
+            elif found and snapshot.env is self.env:
+                later.append(snapshot)
+        return later
+
+    def _heir(self, later, key):
+        """Return the later snapshot that saved the value of `key` set by
+        this snapshot, it restores the value saved here."""
+        for snapshot in later:
+            if key in snapshot.saved:
+                if key in self.applied and snapshot.saved[key] == self.applied[key]:
+                    return snapshot
+                return None
+        return None
+
+    def restore(self):
+        """Restore the saved values.
+
+        A variable modified by someone else after the changes is not
+        overwritten, only the entries added to the path-lists are removed.
+        A variable saved by a later snapshot, still to be restored, is left as
+        it is and the later snapshot restores the value saved here.
+        """
+        if self.restored:
+            return
+        env = self.env
+        with _LIVE_LOCK:
+            later = self._unregister()
+            for key, value in self.saved.items():
+                heir = self._heir(later, key)
+                if heir is not None:
+                    heir.saved[key] = value
+                    continue
+                current = env.get(key)
+                if key in self.applied and current != self.applied[key]:
+                    if key in PATH_VARIABLES and current is not None:
+                        env[key] = self._remove_added(key, current)
+                    continue
+                if value is None:
+                    env.pop(key, None)
+                else:
+                    env[key] = value
+        _release_syspath(self.syspath_added)
+        self.restored = True
+
+    def _remove_added(self, key, current):
+        before = set(split_paths(self.saved[key]))
+        added = set(split_paths(self.applied[key])) - before
+        return os.pathsep.join(
+            path for path in split_paths(current) if path not in added
+        )
@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Execute a function over many items in parallel, each worker process works in
+its own temporary mapset, and create many mapsets at once.
+"""
+import os
+import shutil
+import time
+import uuid
+from collections import OrderedDict
+
+from grass_session.session import (
+    can_create_mapset,
+    get_grass_bin,
+    get_grass_gisbase,
+    grass_create,
+    set_grass_path_env,
+    write_gisrc,
+)
+
+
+def _bind_worker(gisrcs, gisbase):
+    """Bind the worker process to one of the temporary mapsets."""
+    set_grass_path_env(gisbase=gisbase, env=os.environ)
+    os.environ["GISRC"] = gisrcs.get()
+    os.environ["GIS_LOCK"] = str(os.getpid())
+
+
+def map_over_mapsets(
+    func,
+    items,
+    gisdb,
+    location,
+    workers=None,
+    grassversion=None,
+    grassbin=None,
+    prefix="tmp",
+    keep=False,
+):
+    """Apply `func` to every item using a pool of processes and return the
+    list of results.
+
+    A new mapset is created in the location for each worker, the worker
+    environment (``GISRC`` and ``GIS_LOCK``) is bound to its own mapset, so
+    `func` can use the GRASS modules and the GRASS python libraries without
+    conflicts with the other workers. The mapsets are removed at the end.
+
+    Parameters
+    ----------
+    func : callable
+        Picklable function called with one item at the time
+    items : iterable
+        Items (e.g. tiles) to be processed
+    gisdb : string, path-like
+        Path to the GISDB directory
+    location : string
+        Name of an existing location
+    workers : int
+        Number of processes, by default the number of CPUs
+    grassversion : string
+        Default GRASS GIS stable version
+    grassbin : path
+        Path to the GRASS binary file
+    prefix : string
+        Prefix of the temporary mapset names
+    keep : bool
+        If True the mapsets are not removed
+
+    Examples
+    --------
+    >>> def ndvi(tile):
+    ...     gcore.run_command("g.region", **tile)
+    ...     gcore.mapcalc("ndvi = float(nir - red) / (nir + red)")
+    ...     return gcore.parse_command("r.univar", map="ndvi", flags="g")
+    >>> stats = map_over_mapsets(ndvi, tiles, gisdb=TMPDIR, location="loc",
+    ...                          workers=4)
+    """
+    # lazy import
+    import multiprocessing
+
+    workers = multiprocessing.cpu_count() if workers is None else workers
+    grassbin = get_grass_bin(version=grassversion) if grassbin is None else grassbin
+    gisbase = get_grass_gisbase(grassbin=grassbin)
+
+    basename = "{}_{}".format(prefix, uuid.uuid4().hex[:8])
+    mpaths, gisrcs = [], []
+    manager = multiprocessing.Manager()
+    try:
+        queue = manager.Queue()
+        for i in range(workers):
+            mapset = "{}_{}".format(basename, i)
+            mpath = os.path.join(str(gisdb), str(location), mapset)
+            grass_create(grassbin, mpath, "")
+            mpaths.append(mpath)
+            gisrcs.append(write_gisrc(gisdb, location, mapset))
+            queue.put(gisrcs[-1])
+
+        # multiprocessing.Pool accepts an initializer on every supported
+        # python version, ProcessPoolExecutor only since python 3.7
+        pool = multiprocessing.Pool(
+            processes=workers, initializer=_bind_worker, initargs=(queue, gisbase)
+        )
+        try:
+            results = pool.map(func, items)
+        except BaseException:
+            pool.terminate()
+            raise
+        else:
+            pool.close()
+        finally:
+            pool.join()
+        return results
+    finally:
+        manager.shutdown()
+        for gisrc in gisrcs:
+            os.remove(gisrc)
+        if not keep:
+            for mpath in mpaths:
+                shutil.rmtree(mpath)
+
+
+def create_mapsets(
+    gisdb, location, names, workers=None, grassversion=None, grassbin=None, native=True
+):
+    """Create many mapsets in an existing location using a pool of threads.
+
+    With `native` the mapsets are created copying the region files of
+    PERMANENT (see `create_mapset`), the GRASS launcher is executed only if
+    the location cannot be handled natively. The existing mapsets are
+    skipped and the errors do not stop the other mapsets.
+
+    Parameters
+    ----------
+    gisdb : string, path-like
+        Path to the GISDB directory
+    location : string
+        Name of an existing location
+    names : iterable
+        Names of the new mapsets
+    workers : int
+        Number of threads, by default the number of CPUs
+    grassversion : string
+        Default GRASS GIS stable version
+    grassbin : path
+        Path to the GRASS binary file, resolved only if the launcher is used
+    native : bool
+        Create the mapsets without executing the GRASS launcher
+
+    Returns
+    -------
+    A dictionary with the status of each mapset (``created``, ``exists`` or
+    the error message) in ``status``, the number of ``created`` and of
+    ``failed`` mapsets, the elapsed ``seconds`` and the ``throughput`` in
+    created mapsets per second.
+
+    Examples
+    --------
+    >>> result = create_mapsets(TMPDIR, "loc", ["m%03d" % i for i in range(500)],
+    ...                         workers=8)
+    >>> result["created"], result["failed"]
+    (500, 0)
+    """
+    # lazy import
+    import multiprocessing
+    from multiprocessing.pool import ThreadPool
+
+    workers = multiprocessing.cpu_count() if workers is None else workers
+    lpath = os.path.join(str(gisdb), str(location))
+    names = list(OrderedDict.fromkeys(names))
+    if not native or not can_create_mapset(os.path.join(lpath, uuid.uuid4().hex)):
+        if grassbin is None:
+            grassbin = get_grass_bin(version=grassversion)
+
+    def create(name):
+        path = os.path.join(lpath, name)
+        if not name or os.sep in name or name in (".", ".."):
+            return "invalid mapset name"
+        if os.path.exists(path):
+            return "exists"
+        try:
+            grass_create(grassbin, path, "", native=native)
+        except Exception as exc:
+            return str(exc)
+        return "created"
+
+    start = time.time()
+    pool = ThreadPool(processes=max(workers, 1))
+    try:
+        status = OrderedDict(zip(names, pool.map(create, names)))
+    finally:
+        pool.close()
+        pool.join()
+    seconds = time.time() - start
+    created = sum(1 for value in status.values() if value == "created")
+    return {
+        "status": status,
+        "created": created,
+        "failed": sum(
+            1 for value in status.values() if value not in ("created", "exists")
+        ),
+        "seconds": seconds,
+        "throughput": created / seconds if seconds > 0 else float("inf"),
+    }
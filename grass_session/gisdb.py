@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Index of the locations and mapsets of a GRASS GIS database.
+
+The database is scanned once with ``os.scandir`` (``os.listdir`` on python 2);
+afterwards a directory is scanned again only when its modification time
+changes, so the queries cost one ``stat`` call instead of a walk of the whole
+database.
+"""
+import os
+import threading
+
+# files describing the projection of a location, stored in PERMANENT
+PROJ_FILES = ("PROJ_INFO", "PROJ_UNITS", "PROJ_EPSG")
+
+
+def _mtime(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    # st_mtime_ns is not available on python 2
+    return getattr(st, "st_mtime_ns", st.st_mtime)
+
+
+def _subdirs(path):
+    """Return the names of the sub-directories of path."""
+    if hasattr(os, "scandir"):
+        return [entry.name for entry in os.scandir(path) if entry.is_dir()]
+    return [
+        name for name in os.listdir(path) if os.path.isdir(os.path.join(path, name))
+    ]
+
+
+def read_key_values(path):
+    """Return a dictionary with the ``key: value`` lines of a file."""
+    values = {}
+    with open(path, "r") as fl:
+        for line in fl:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                values[key.strip()] = value.strip()
+    return values
+
+
+class _Location(object):
+    __slots__ = ("mtime", "mapsets", "pending", "proj", "proj_mtime")
+
+    def __init__(self):
+        self.mtime = None
+        # valid mapsets (with a WIND file) and directories that could become
+        # a mapset without changing the mtime of the location
+        self.mapsets = set()
+        self.pending = set()
+        self.proj = None
+        self.proj_mtime = None
+
+
+class GisDB(object):
+    def __init__(self, path):
+        """Index the locations and the mapsets of a GRASS GIS database.
+
+        Parameters
+        ----------
+        path : string, path-like
+            Path to the GISDB directory
+
+        Examples
+        --------
+        >>> gisdb = GisDB("/data/grassdata")
+        >>> gisdb.locations()
+        ['europe', 'nc_spm_08']
+        >>> gisdb.mapsets("nc_spm_08")
+        ['PERMANENT', 'user1']
+        >>> gisdb.projection("europe")["PROJ_EPSG"]
+        {'epsg': '3035'}
+        >>> with Session(gisdb=gisdb, location="europe", mapset="user1"):
+        ...     pass
+        """
+        self.path = os.path.abspath(str(path))
+        self.scans = 0
+        self._mtime = None
+        self._locations = {}
+        self._lock = threading.RLock()
+
+    def __fspath__(self):
+        return self.path
+
+    def __str__(self):
+        return self.path
+
+    def __repr__(self):
+        return "GisDB({!r})".format(self.path)
+
+    def _scan_gisdb(self):
+        mtime = _mtime(self.path)
+        if mtime is None:
+            raise RuntimeError("The GISDB {} does not exist".format(self.path))
+        if mtime == self._mtime:
+            return
+        self.scans += 1
+        names = set()
+        for name in _subdirs(self.path):
+            if os.path.isfile(os.path.join(self.path, name, "PERMANENT", "DEFAULT_WIND")):
+                names.add(name)
+        for name in set(self._locations) - names:
+            del self._locations[name]
+        for name in names - set(self._locations):
+            self._locations[name] = _Location()
+        self._mtime = mtime
+
+    def _scan_location(self, name):
+        location = self._locations[name]
+        path = os.path.join(self.path, name)
+        mtime = _mtime(path)
+        if mtime is None:
+            del self._locations[name]
+            return None
+        if mtime != location.mtime:
+            self.scans += 1
+            location.mapsets, location.pending = set(), set(_subdirs(path))
+            location.mtime = mtime
+        for mapset in list(location.pending):
+            if os.path.isfile(os.path.join(path, mapset, "WIND")):
+                location.pending.discard(mapset)
+                location.mapsets.add(mapset)
+        return location
+
+    def _get(self, name):
+        """Return the updated entry of a location or None."""
+        with self._lock:
+            if name not in self._locations:
+                self._scan_gisdb()
+                if name not in self._locations:
+                    return None
+            return self._scan_location(name)
+
+    def refresh(self):
+        """Update the index, only the directories modified since the last
+        scan are read again."""
+        with self._lock:
+            self._scan_gisdb()
+            for name in list(self._locations):
+                self._scan_location(name)
+
+    def invalidate(self, location=None):
+        """Forget the cached content of a location or of the whole database,
+        useful on file systems with a coarse mtime resolution."""
+        with self._lock:
+            self._mtime = None
+            if location is None:
+                self._locations.clear()
+            else:
+                self._locations.pop(location, None)
+
+    def locations(self):
+        """Return the sorted list of the locations."""
+        with self._lock:
+            self._scan_gisdb()
+            return sorted(self._locations)
+
+    def mapsets(self, location):
+        """Return the sorted list of the mapsets of a location."""
+        entry = self._get(location)
+        if entry is None:
+            raise RuntimeError(
+                "Location {} not found in {}".format(location, self.path)
+            )
+        return sorted(entry.mapsets)
+
+    def exists(self, location, mapset=None):
+        """Return True if the location (and the mapset) exists."""
+        entry = self._get(location)
+        if entry is None:
+            return False
+        return mapset is None or mapset in entry.mapsets
+
+    def validate(self, location, mapset="PERMANENT"):
+        """Return the path of the mapset, raise a RuntimeError if the location
+        or the mapset do not exist."""
+        entry = self._get(location)
+        if entry is None:
+            raise RuntimeError(
+                "Location {} not found in {}".format(location, self.path)
+            )
+        if mapset not in entry.mapsets:
+            raise RuntimeError(
+                "Mapset {} not found in {}".format(
+                    mapset, os.path.join(self.path, location)
+                )
+            )
+        return os.path.join(self.path, location, mapset)
+
+    def projection(self, location):
+        """Return a dictionary with the content of the projection files of a
+        location (``PROJ_INFO``, ``PROJ_UNITS``, ``PROJ_EPSG``), an empty
+        dictionary for the XY locations."""
+        entry = self._get(location)
+        if entry is None:
+            raise RuntimeError(
+                "Location {} not found in {}".format(location, self.path)
+            )
+        permanent = os.path.join(self.path, location, "PERMANENT")
+        paths = [os.path.join(permanent, fname) for fname in PROJ_FILES]
+        mtime = tuple(_mtime(path) for path in paths)
+        with self._lock:
+            if entry.proj is None or entry.proj_mtime != mtime:
+                entry.proj = {
+                    fname: read_key_values(path)
+                    for fname, path, ftime in zip(PROJ_FILES, paths, mtime)
+                    if ftime is not None
+                }
+                entry.proj_mtime = mtime
+            return {fname: dict(values) for fname, values in entry.proj.items()}
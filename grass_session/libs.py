@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Load the GRASS GIS C libraries in the current process.
+
+The libraries are loaded following the dependencies declared in the ELF
+``DT_NEEDED`` entries, the loading order is cached in the user cache
+directory and the libraries are loaded only once per process.
+"""
+import logging
+import os
+import struct
+import sys
+import time
+from glob import glob
+
+from grass_session import cache
+
+logger = logging.getLogger(__name__)
+
+LIBS_CACHE = "libs.json"
+
+DT_NULL = 0
+DT_NEEDED = 1
+DT_SONAME = 14
+SHT_DYNAMIC = 6
+
+# gisbase => dictionary with the loading time of each library
+_LOADED = {}
+
+
+def _elf_sections(elf, ident):
+    """Return the byte order, the ELF class and the list of ``(sh_type,
+    sh_offset, sh_size, sh_link)`` of the section headers."""
+    is64 = ident[4:5] == b"\x02"
+    order = "<" if ident[5:6] == b"\x01" else ">"
+    if is64:
+        elf.seek(0x28)
+        shoff, = struct.unpack(order + "Q", elf.read(8))
+        elf.seek(0x3A)
+    else:
+        elf.seek(0x20)
+        shoff, = struct.unpack(order + "I", elf.read(4))
+        elf.seek(0x2E)
+    shentsize, shnum = struct.unpack(order + "HH", elf.read(4))
+    # sh_type, sh_offset, sh_size, sh_link
+    shfmt = order + ("4xI16xQQI" if is64 else "4xI8xIII")
+    sections = []
+    for i in range(shnum):
+        elf.seek(shoff + i * shentsize)
+        sections.append(struct.unpack(shfmt, elf.read(struct.calcsize(shfmt))))
+    return order, is64, sections
+
+
+def _elf_string(elf, offset):
+    """Return the null-terminated string at `offset`."""
+    elf.seek(offset)
+    chars = b""
+    while True:
+        char = elf.read(1)
+        if char in (b"", b"\0"):
+            return chars.decode()
+        chars += char
+
+
+def _dynamic_entries(elf, offset, size, dynfmt):
+    """Return the ``(d_tag, d_val)`` entries of a dynamic section."""
+    dynsize = struct.calcsize(dynfmt)
+    elf.seek(offset)
+    entries = []
+    for _ in range(size // dynsize):
+        tag, val = struct.unpack(dynfmt, elf.read(dynsize))
+        if tag == DT_NULL:
+            break
+        entries.append((tag, val))
+    return entries
+
+
+def elf_dynamic(path):
+    """Return a tuple with the ``DT_SONAME`` and the list of ``DT_NEEDED``
+    entries of an ELF shared library, return None if the file is not an ELF
+    file."""
+    with open(path, "rb") as elf:
+        ident = elf.read(16)
+        if len(ident) < 16 or ident[:4] != b"\x7fELF":
+            return None
+        order, is64, sections = _elf_sections(elf, ident)
+        dynfmt = order + ("qQ" if is64 else "iI")
+        soname, needed = None, []
+        for shtype, offset, size, link in sections:
+            if shtype != SHT_DYNAMIC:
+                continue
+            stroffset = sections[link][1]
+            for tag, val in _dynamic_entries(elf, offset, size, dynfmt):
+                if tag == DT_NEEDED:
+                    needed.append(_elf_string(elf, stroffset + val))
+                elif tag == DT_SONAME:
+                    soname = _elf_string(elf, stroffset + val)
+        return soname, needed
+
+
+def load_order(libs):
+    """Return the list of libraries sorted so that each library comes after
+    the libraries that it needs, libraries without dependency information
+    keep their position."""
+    names, deps = {}, {}
+    for lib in libs:
+        try:
+            dynamic = elf_dynamic(lib)
+        except (IOError, OSError, struct.error, IndexError):
+            dynamic = None
+        soname, needed = dynamic if dynamic else (None, [])
+        names[os.path.basename(lib)] = lib
+        if soname:
+            names[soname] = lib
+        deps[lib] = needed
+
+    order, visited = [], set()
+
+    def visit(lib):
+        if lib in visited:
+            return
+        visited.add(lib)
+        for name in deps[lib]:
+            if name in names:
+                visit(names[name])
+        order.append(lib)
+
+    for lib in libs:
+        visit(lib)
+    return order
+
+
+def get_load_order(gisbase, libs):
+    """Return the loading order of the libraries, the order is read from the
+    cache if the library directory has not been modified."""
+    ld_path = os.path.join(gisbase, "lib")
+    st = os.stat(ld_path)
+    mtime = getattr(st, "st_mtime_ns", st.st_mtime)
+    persistent = cache.is_cache_enabled()
+    cached = cache.read_json(LIBS_CACHE, default={}) if persistent else {}
+    entry = cached.get(gisbase)
+    if (
+        entry is not None
+        and entry.get("mtime") == mtime
+        and sorted(entry.get("order", [])) == sorted(libs)
+    ):
+        return entry["order"]
+    order = load_order(libs)
+    if persistent:
+        cached[gisbase] = dict(mtime=mtime, order=order)
+        cache.write_json(LIBS_CACHE, cached)
+    return order
+
+
+def _load(libs, timings, errors):
+    """Load the libraries, store the loading time of each library in
+    `timings` and the exceptions in `errors`, return the libraries that
+    cannot be loaded."""
+    # lazy import
+    import ctypes
+
+    failed = []
+    for lib in libs:
+        lstart = time.time()
+        try:
+            ctypes.CDLL(lib, mode=1)
+        except Exception as exc:
+            errors[lib] = exc
+            failed.append(lib)
+            continue
+        timings[lib] = time.time() - lstart
+        logger.debug("Loaded %s in %.6f s", lib, timings[lib])
+    return failed
+
+
+def load_libs(gisbase=None):
+    """Load the GRASS GIS libraries in the current process and return a
+    dictionary with the time in seconds required to load each library.
+
+    The libraries are loaded only once per process, the following calls
+    return the timings of the first call."""
+    # define LD_LIBRARY_PATH
+    gisbase = os.environ["GISBASE"] if not gisbase else gisbase
+    if not gisbase:
+        raise RuntimeError("No gisbase supplied!")
+    if gisbase in _LOADED:
+        return _LOADED[gisbase]
+
+    ld_path = os.path.join(gisbase, "lib")
+    lib_suffix = "dll" if sys.platform == "win32" else "so"
+    logger.info("Loading libraries from %s", ld_path)
+    grasslibs = sorted(glob("{}{}*.{}".format(ld_path, os.path.sep, lib_suffix)))
+    if len(grasslibs) == 0:
+        raise RuntimeError("No GRASS GIS libraries found in {}.".format(ld_path))
+
+    start = time.time()
+    timings, errors = {}, {}
+    remains = _load(get_load_order(gisbase, grasslibs), timings, errors)
+    # retry the libraries that depend on libraries outside the GRASS lib dir
+    while remains:
+        failed = _load(remains, timings, errors)
+        if len(failed) == len(remains):
+            break
+        remains = failed
+
+    if remains:
+        for lib in remains:
+            logger.error("Cannot load %s: %s", lib, errors[lib])
+        raise RuntimeError(
+            "Cannot load all the following GRASS GIS libraries from {}!".format(remains)
+        )
+    logger.info(
+        "Loaded %d libraries in %.3f s", len(timings), time.time() - start
+    )
+    _LOADED[gisbase] = timings
+    return timings
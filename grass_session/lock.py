@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Lock the mapsets shared by concurrent processes.
+
+A writer owns the ``.gislock`` file of the mapset, the file is created
+atomically (``O_CREAT | O_EXCL``) and contains the pid of the owner like the
+lock written by GRASS GIS. The readers are registered as files in the
+``.gislock.readers`` directory of the mapset: many readers can use the mapset
+at the same time, while a writer waits until all the readers are gone and
+blocks the new readers as soon as it owns ``.gislock``.
+
+The locks of the processes that are not running anymore are considered
+stale and removed.
+"""
+import errno
+import os
+import sys
+import time
+
+LOCK = ".gislock"
+READERS = ".gislock.readers"
+
+
+class MapsetLockError(RuntimeError):
+    """The mapset lock cannot be acquired."""
+
+
+def pid_alive(pid):
+    """Return True if a process with the given pid is running."""
+    if pid <= 0:
+        return False
+    if sys.platform == "win32":
+        # os.kill terminates the process on Windows, assume it is running
+        return True
+    try:
+        os.kill(pid, 0)
+    except OSError as err:
+        # EPERM: the process exists but belongs to another user
+        return err.errno == errno.EPERM
+    return True
+
+
+def read_pid(path):
+    """Return the pid written in a lock file, 0 if the file is empty or
+    invalid and None if the file does not exist."""
+    try:
+        with open(path, "r") as lock:
+            content = lock.read().strip()
+    except (IOError, OSError) as err:
+        if err.errno == errno.ENOENT:
+            return None
+        raise
+    try:
+        return int(content.split()[0])
+    except (IndexError, ValueError):
+        return 0
+
+
+def _create(path, pid):
+    """Create atomically a lock file containing `pid`, return False if the
+    file already exists."""
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+    except OSError as err:
+        if err.errno == errno.EEXIST:
+            return False
+        raise
+    try:
+        os.write(fd, "{}\n".format(pid).encode())
+    finally:
+        os.close(fd)
+    return True
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError as err:
+        if err.errno != errno.ENOENT:
+            raise
+
+
+def break_stale(path):
+    """Remove a lock file if its owner is not running, return True if the
+    lock is free."""
+    pid = read_pid(path)
+    if pid is None:
+        return True
+    if pid_alive(pid):
+        return False
+    # move the file before removing it: only one process breaks the lock and
+    # a lock created in the meantime by a live process is put back
+    stale = "{}.stale.{}".format(path, os.getpid())
+    try:
+        os.rename(path, stale)
+    except OSError as err:
+        if err.errno == errno.ENOENT:
+            return True
+        raise
+    if read_pid(stale) != pid:
+        try:
+            os.link(stale, path)
+        except OSError:
+            pass
+        _remove(stale)
+        return False
+    _remove(stale)
+    return True
+
+
+class MapsetLock(object):
+    def __init__(self, path, shared=False, pid=None, poll=0.05):
+        """Exclusive or shared lock of a mapset.
+
+        Parameters
+        ----------
+        path : string, path-like
+            Path to the mapset directory
+        shared : bool
+            Acquire a shared lock for a read-only access, by default the lock
+            is exclusive
+        pid : int
+            Pid written in the lock, by default the pid of the current process
+        poll : float
+            Seconds between two attempts of a blocking acquisition
+
+        Examples
+        --------
+        >>> with MapsetLock("/grassdata/loc/PERMANENT", shared=True):
+        ...     with Session(gisdb="/grassdata", location="loc"):
+        ...         print(read_command("r.info", map="elevation"))
+        """
+        self.path = str(path)
+        self.shared = shared
+        self.pid = os.getpid() if pid is None else pid
+        self.poll = poll
+        self.locked = False
+        self._reader = None
+
+    @property
+    def lockfile(self):
+        return os.path.join(self.path, LOCK)
+
+    @property
+    def readers(self):
+        return os.path.join(self.path, READERS)
+
+    def writer(self):
+        """Return the pid of the process owning the exclusive lock or None."""
+        pid = read_pid(self.lockfile)
+        return pid if pid is not None and pid_alive(pid) else None
+
+    def active_readers(self):
+        """Return the list of the pids of the running readers, removing the
+        stale readers."""
+        try:
+            names = os.listdir(self.readers)
+        except OSError as err:
+            if err.errno == errno.ENOENT:
+                return []
+            raise
+        pids = []
+        for name in names:
+            path = os.path.join(self.readers, name)
+            if path == self._reader:
+                continue
+            pid = read_pid(path)
+            if pid is None:
+                continue
+            if pid_alive(pid):
+                pids.append(pid)
+            else:
+                _remove(path)
+        return pids
+
+    def _try_shared(self):
+        if not break_stale(self.lockfile):
+            return False
+        try:
+            os.mkdir(self.readers)
+        except OSError as err:
+            if err.errno != errno.EEXIST:
+                raise
+        reader = os.path.join(self.readers, "{}.{}".format(self.pid, id(self)))
+        if not _create(reader, self.pid):
+            return False
+        # a writer can have created the lock in the meantime
+        if self.writer() is not None:
+            _remove(reader)
+            return False
+        self._reader = reader
+        return True
+
+    def _try_exclusive(self, deadline):
+        if not _create(self.lockfile, self.pid):
+            if not break_stale(self.lockfile) or not _create(
+                self.lockfile, self.pid
+            ):
+                return False
+        # the new readers are blocked, wait for the active ones
+        while self.active_readers():
+            if deadline is not None and time.time() >= deadline:
+                _remove(self.lockfile)
+                return False
+            time.sleep(self.poll)
+        return True
+
+    def acquire(self, blocking=True, timeout=None):
+        """Acquire the lock, return True if the lock has been acquired.
+
+        Parameters
+        ----------
+        blocking : bool
+            Wait until the lock is free, otherwise return immediately
+        timeout : float
+            Maximum number of seconds to wait, by default wait forever
+        """
+        if self.locked:
+            raise MapsetLockError("The lock of {} is already held".format(self.path))
+        if not os.path.isdir(self.path):
+            raise MapsetLockError("{} is not a mapset".format(self.path))
+        deadline = None
+        if not blocking:
+            deadline = time.time()
+        elif timeout is not None:
+            deadline = time.time() + timeout
+        while True:
+            if self.shared:
+                self.locked = self._try_shared()
+            else:
+                self.locked = self._try_exclusive(deadline)
+            if self.locked:
+                return True
+            if deadline is not None and time.time() >= deadline:
+                return False
+            time.sleep(self.poll)
+
+    def release(self):
+        """Release the lock."""
+        if not self.locked:
+            raise MapsetLockError("The lock of {} is not held".format(self.path))
+        if self.shared:
+            _remove(self._reader)
+            self._reader = None
+        elif read_pid(self.lockfile) == self.pid:
+            _remove(self.lockfile)
+        self.locked = False
+
+    def __enter__(self):
+        if not self.acquire():
+            raise MapsetLockError("Cannot lock {}".format(self.path))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    def __repr__(self):
+        return "MapsetLock({!r}, shared={!r}, locked={!r})".format(
+            self.path, self.shared, self.locked
+        )
@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Cache the output of the read-only GRASS modules used to query metadata.
+
+The output of a query (``g.proj -g``, ``g.region -g``, ``r.info -g``, ...) is
+stored with a fingerprint of the files that the module reads: the ``gisrc``
+file, the ``WIND`` file, the projection files of PERMANENT, the headers of
+the maps and the region variables of the environment. A cached output is
+returned only while the fingerprint does not change, so the queries are
+dictionary reads until the mapset is modified.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+from grass_session.session import make_command
+
+# module => (allowed flags, allowed options or None for any option)
+QUERY_MODULES = {
+    "g.proj": ("pgjwfedt", ("format",)),
+    "g.region": ("gpcelnbwm3t", ()),
+    "g.gisenv": ("ns", ("get",)),
+    "r.info": (None, None),
+    "v.info": (None, None),
+    "g.list": (None, None),
+}
+
+PROJ_FILES = ("PROJ_INFO", "PROJ_UNITS", "PROJ_EPSG", "DEFAULT_WIND")
+# directories of the elements listed by g.list
+ELEMENTS = ("cellhd", "vector", "grid3", "windows", "group")
+
+
+def _stat(path):
+    """Return the modification time and the size of a path or None."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (getattr(st, "st_mtime_ns", st.st_mtime), st.st_size)
+
+
+def _stat_dir(path):
+    """Return the stats of a directory and of its files or None."""
+    try:
+        names = sorted(os.listdir(path))
+    except OSError:
+        return None
+    return (_stat(path),) + tuple(
+        (name, _stat(os.path.join(path, name))) for name in names
+    )
+
+
+def is_query(module, flags="", overwrite=False, **options):
+    """Return True if the module call does not modify the mapset."""
+    if module not in QUERY_MODULES or overwrite:
+        return False
+    allowed_flags, allowed_options = QUERY_MODULES[module]
+    if allowed_flags is not None and not set(flags) <= set(allowed_flags):
+        return False
+    options = [key for key, value in options.items() if value is not None]
+    options = [key for key in options if key not in ("quiet", "verbose")]
+    if allowed_options is not None and not set(options) <= set(allowed_options):
+        return False
+    return True
+
+
+class QueryCache(object):
+    def __init__(self, sess, maxsize=1024):
+        """Cache of the outputs of the query modules executed in a session.
+
+        Parameters
+        ----------
+        sess : Session
+            The session executing the modules
+        maxsize : int
+            Maximum number of cached outputs, the least recently used are
+            discarded first
+        """
+        self.sess = sess
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self._cache = OrderedDict()
+        self._gisrc = (None, None)
+        self._lock = threading.Lock()
+
+    def stats(self):
+        """Return a dictionary with the number of hits, misses and of the
+        calls that cannot be cached."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "size": len(self._cache),
+        }
+
+    def clear(self):
+        """Discard the cached outputs."""
+        with self._lock:
+            self._cache.clear()
+
+    def _gisenv(self, env):
+        """Return the stats and the content of the gisrc file."""
+        gisrc = env.get("GISRC")
+        stat = _stat(gisrc) if gisrc else None
+        if stat is None:
+            return None, {}
+        if self._gisrc[0] != (gisrc, stat):
+            with open(gisrc, "r") as rc:
+                gisenv = dict(
+                    [item.strip() for item in line.split(":", 1)]
+                    for line in rc.read().splitlines()
+                    if ":" in line
+                )
+            self._gisrc = ((gisrc, stat), gisenv)
+        return self._gisrc
+
+    def fingerprint(self, module, env, **options):
+        """Return a tuple describing the state read by a module."""
+        gisrc, gisenv = self._gisenv(env)
+        state = [gisrc, env.get("GRASS_REGION"), env.get("WIND_OVERRIDE")]
+        if not gisenv:
+            return tuple(state)
+        location = os.path.join(
+            gisenv.get("GISDBASE", ""), gisenv.get("LOCATION_NAME", "")
+        )
+        mapset = gisenv.get("MAPSET", "")
+        mpath = os.path.join(location, mapset)
+        state.append(_stat(os.path.join(mpath, "WIND")))
+        if env.get("WIND_OVERRIDE"):
+            state.append(_stat(os.path.join(mpath, "windows", env["WIND_OVERRIDE"])))
+        permanent = os.path.join(location, "PERMANENT")
+        state.extend(_stat(os.path.join(permanent, fname)) for fname in PROJ_FILES)
+        if module in ("r.info", "v.info"):
+            state.extend(self._map_state(module, location, mapset, options))
+        elif module == "g.list":
+            state.extend(self._list_state(location, mapset, options))
+        return tuple(state)
+
+    def _search_path(self, location, mapset):
+        path = os.path.join(location, mapset, "SEARCH_PATH")
+        try:
+            with open(path, "r") as fl:
+                mapsets = [line.strip() for line in fl if line.strip()]
+        except (IOError, OSError):
+            mapsets = [mapset, "PERMANENT"]
+        return [mapset] + [name for name in mapsets if name != mapset]
+
+    def _map_state(self, module, location, mapset, options):
+        name = str(options.get("map", ""))
+        if "@" in name:
+            name, mapsets = name.split("@", 1)[0], [name.split("@", 1)[1]]
+        else:
+            mapsets = self._search_path(location, mapset)
+        state = [_stat(os.path.join(location, mapset, "SEARCH_PATH"))]
+        for mname in mapsets:
+            mpath = os.path.join(location, mname)
+            if module == "r.info":
+                state.append(_stat(os.path.join(mpath, "cellhd", name)))
+                state.append(_stat_dir(os.path.join(mpath, "cell_misc", name)))
+                state.append(_stat(os.path.join(mpath, "hist", name)))
+                state.append(_stat(os.path.join(mpath, "cats", name)))
+            else:
+                state.append(_stat_dir(os.path.join(mpath, "vector", name)))
+        return state
+
+    def _list_state(self, location, mapset, options):
+        if options.get("mapset") is None:
+            mapsets = self._search_path(location, mapset)
+            state = [_stat(os.path.join(location, mapset, "SEARCH_PATH"))]
+        else:
+            mapsets = sorted(
+                name
+                for name in os.listdir(location)
+                if os.path.isdir(os.path.join(location, name))
+            )
+            state = [_stat(location)]
+        for mname in mapsets:
+            mpath = os.path.join(location, mname)
+            state.extend(_stat(os.path.join(mpath, elem)) for elem in ELEMENTS)
+        return state
+
+    def read_command(self, read_command, module, env=None, **kwargs):
+        """Return the output of a module calling ``read_command(module, env,
+        **kwargs)`` only if the output is not cached."""
+        if not is_query(module, **kwargs):
+            self.bypassed += 1
+            return read_command(module, env=env, **kwargs)
+        env = self.sess.env if env is None else env
+        key = (
+            tuple(make_command(module, **kwargs)),
+            self.fingerprint(module, env, **kwargs),
+        )
+        with self._lock:
+            output = self._cache.get(key)
+            if output is not None:
+                self._cache[key] = self._cache.pop(key)
+                self.hits += 1
+                return output
+        output = read_command(module, env=env, **kwargs)
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = output
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return output
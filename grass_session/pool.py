@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Pool of opened GRASS GIS sessions that can be reused by many short jobs.
+"""
+import contextlib
+import threading
+from collections import OrderedDict
+
+from grass_session.session import Session
+
+
+class SessionPool(object):
+    def __init__(
+        self, maxsize=8, grassversion=None, grassbin=None, lock=False, lock_timeout=None
+    ):
+        """Keep a bounded number of opened sessions, the sessions are
+        indexed by gisdb/location/mapset and each one owns a private
+        environment with its own ``gisrc`` file and ``GIS_LOCK``. With `lock`
+        the sessions also own the lock of their mapset, the lock is kept
+        while the session is idle in the pool and released when the session
+        is evicted or the pool is cleared.
+
+        Parameters
+        ----------
+        maxsize : int
+            Maximum number of idle sessions kept in the pool, the least
+            recently used sessions are closed first
+        grassversion : string
+            Default GRASS GIS stable version
+        grassbin : path
+            Path to the GRASS binary file
+        lock : bool or string
+            Lock the mapsets of the pooled sessions, ``"shared"`` or
+            ``"exclusive"`` (or True), see `Session.open`
+        lock_timeout : float
+            Maximum number of seconds to wait for the lock when a new
+            session is opened
+
+        Examples
+        --------
+        >>> pool = SessionPool(maxsize=4)
+        >>> with pool.session(gisdb=TMPDIR, location="loc",
+        ...                   mapset="mset") as sess:
+        ...     print(read_command("g.region", flags="p", env=sess.env))
+        >>> pool.stats()
+        {'hits': 0, 'misses': 1, 'evictions': 0, 'idle': 1, 'busy': 0}
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be greater than zero")
+        self.maxsize = maxsize
+        self.grassversion = grassversion
+        self.grassbin = grassbin
+        self.lock = lock
+        self.lock_timeout = lock_timeout
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # key => list of idle sessions, sorted from the least recently used
+        self._idle = OrderedDict()
+        # id(session) => (key, session) of the sessions in use
+        self._busy = {}
+        # id(session) => environment of the session just after opening it
+        self._warm = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(gisdb, location, mapset):
+        return (str(gisdb), str(location), "PERMANENT" if mapset is None else mapset)
+
+    def _nidle(self):
+        return sum(len(sessions) for sessions in self._idle.values())
+
+    def checkout(self, gisdb, location, mapset=None, create_opts=None):
+        """Return an opened session, reusing an idle one if available.
+
+        Parameters
+        ----------
+        gisdb : string, path-like
+            Path to the GISDB directory
+        location : string
+            Location name
+        mapset : string
+            Mapset name
+        create_opts : string
+            Valid string for the grass `-c` flag, used only if a new session
+            must be opened
+        """
+        key = self._key(gisdb, location, mapset)
+        with self._lock:
+            sessions = self._idle.get(key)
+            if sessions:
+                sess = sessions.pop()
+                if not sessions:
+                    del self._idle[key]
+                self.hits += 1
+                self._busy[id(sess)] = (key, sess)
+                return sess
+            self.misses += 1
+
+        sess = Session(
+            grassversion=self.grassversion,
+            grassbin=self.grassbin,
+            isolated=True,
+        )
+        try:
+            sess.open(
+                *key,
+                create_opts=create_opts,
+                lock=self.lock,
+                lock_timeout=self.lock_timeout
+            )
+        except Exception:
+            # remove the gisrc file and restore the environment
+            sess.close()
+            raise
+        with self._lock:
+            self._warm[id(sess)] = dict(sess.env)
+            self._busy[id(sess)] = (key, sess)
+        return sess
+
+    def checkin(self, sess):
+        """Give back a session to the pool, the environment of the session is
+        restored and the least recently used sessions are closed if the pool
+        is full."""
+        evicted = []
+        with self._lock:
+            try:
+                key, sess = self._busy.pop(id(sess))
+            except KeyError:
+                raise ValueError("The session does not belong to the pool")
+            if sess.closed:
+                # closed by the user, the gisrc file and the lock are gone
+                self._warm.pop(id(sess), None)
+                return
+            warm = self._warm[id(sess)]
+            if sess.env != warm:
+                sess.env.clear()
+                sess.env.update(warm)
+            self._reset_gisrc(warm["GISRC"], key)
+            self._idle.setdefault(key, []).append(sess)
+            # mark the key as the most recently used
+            self._idle[key] = self._idle.pop(key)
+            while self._nidle() > self.maxsize:
+                lkey, sessions = next(iter(self._idle.items()))
+                evicted.append(sessions.pop(0))
+                if not sessions:
+                    del self._idle[lkey]
+                self.evictions += 1
+        for old in evicted:
+            self._close(old)
+
+    @staticmethod
+    def _reset_gisrc(gisrc, key):
+        """Rewrite the ``gisrc`` file if it was changed (e.g. by g.mapset)."""
+        content = "GISDBASE: {}\nLOCATION_NAME: {}\nMAPSET: {}\n".format(*key)
+        try:
+            with open(gisrc, "r") as rc:
+                if rc.read() == content:
+                    return
+        except (IOError, OSError):
+            pass
+        with open(gisrc, "w") as rc:
+            rc.write(content)
+
+    def _close(self, sess):
+        with self._lock:
+            self._warm.pop(id(sess), None)
+        sess.close()
+
+    @contextlib.contextmanager
+    def session(self, gisdb, location, mapset=None, create_opts=None):
+        """Context manager to checkout a session and give it back at the
+        end."""
+        sess = self.checkout(gisdb, location, mapset=mapset, create_opts=create_opts)
+        try:
+            yield sess
+        finally:
+            self.checkin(sess)
+
+    def stats(self):
+        """Return a dictionary with the hits/misses/evictions counters and
+        the number of idle and busy sessions."""
+        with self._lock:
+            return dict(
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                idle=self._nidle(),
+                busy=len(self._busy),
+            )
+
+    def clear(self):
+        """Close all the idle sessions."""
+        with self._lock:
+            sessions = [sess for idle in self._idle.values() for sess in idle]
+            self._idle.clear()
+        for sess in sessions:
+            self._close(sess)
+
+    close = clear
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.clear()
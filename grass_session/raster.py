@@ -0,0 +1,327 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Move raster maps between a GRASS session and NumPy through binary files.
+
+The maps are exported with ``r.out.bin`` to a file in the session temporary
+directory and mapped in memory with ``numpy.memmap``, the arrays are written
+to a binary file and imported with ``r.in.bin``.
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+
+# GRASS datatype => (numpy dtype, r.out.bin flags, bytes)
+DATATYPES = {
+    "CELL": ("int32", "i", 4),
+    "FCELL": ("float32", "f", 4),
+    "DCELL": ("float64", "f", 8),
+}
+
+INTEGER_KEYS = ("proj", "zone", "rows", "cols", "rows3", "cols3", "depths")
+COORDINATE_KEYS = ("north", "south", "east", "west")
+
+DMS = re.compile(
+    r"^(?P<deg>\d+(\.\d*)?)(:(?P<min>\d+(\.\d*)?))?(:(?P<sec>\d+(\.\d*)?))?"
+    r"(?P<hem>[NSEWnsew])$"
+)
+
+
+def parse_coordinate(value):
+    """Return a coordinate as float, accepting the GRASS DMS format used by
+    the latitude-longitude regions (e.g. ``45:30:00N``)."""
+    match = DMS.match(value.strip())
+    if match is None:
+        return float(value)
+    coor = float(match.group("deg"))
+    coor += float(match.group("min") or 0) / 60.0
+    coor += float(match.group("sec") or 0) / 3600.0
+    return -coor if match.group("hem").upper() in "SW" else coor
+
+
+def parse_region(text):
+    """Return an ordered dictionary with the region read from the content of
+    a region file (e.g. ``WIND``) or from a ``GRASS_REGION`` string."""
+    region = OrderedDict()
+    for line in re.split(r"[;\n]", text):
+        if ":" not in line:
+            continue
+        key, value = [item.strip() for item in line.split(":", 1)]
+        if key in INTEGER_KEYS:
+            region[key] = int(value)
+        elif key in COORDINATE_KEYS:
+            region[key] = parse_coordinate(value)
+        else:
+            try:
+                region[key] = float(value)
+            except ValueError:
+                region[key] = value
+    return region
+
+
+def format_region(region):
+    """Return the region as a ``GRASS_REGION`` string."""
+    return ";".join(
+        "{}: {}".format(key, repr(value) if isinstance(value, float) else value)
+        for key, value in region.items()
+    )
+
+
+def read_region(gisdb, location, mapset, env=None):
+    """Return the current region of a mapset, considering the
+    ``GRASS_REGION`` and ``WIND_OVERRIDE`` variables of the environment."""
+    env = os.environ if env is None else env
+    if env.get("GRASS_REGION"):
+        return parse_region(env["GRASS_REGION"])
+    mpath = os.path.join(str(gisdb), str(location), mapset)
+    if env.get("WIND_OVERRIDE"):
+        path = os.path.join(mpath, "windows", env["WIND_OVERRIDE"])
+    else:
+        path = os.path.join(mpath, "WIND")
+    with open(path, "r") as wind:
+        return parse_region(wind.read())
+
+
+def raster_datatype(sess, name):
+    """Return the GRASS datatype of a raster map (CELL, FCELL or DCELL)."""
+    info = sess.read_command("r.info", flags="g", map=name)
+    for line in info.splitlines():
+        if line.startswith("datatype="):
+            return line.split("=", 1)[1].strip().strip('"')
+    raise RuntimeError("Cannot read the datatype of {}".format(name))
+
+
+def read_raster(sess, name, region=None, null=None, mode="r", datatype=None):
+    """Export a raster map to a binary file and return it as a
+    ``numpy.memmap`` with the region as ``region`` attribute.
+
+    Parameters
+    ----------
+    sess : Session
+        An opened session
+    name : string
+        Name of the raster map
+    region : dict
+        Region used to export the map, by default the current region
+    null : number
+        Value of the null cells, by default NaN for the floating point maps
+        and the minimum int32 value for the integer maps
+    mode : string
+        Mode used to open the memory map (``r``, ``r+`` or ``c``)
+    datatype : string
+        GRASS datatype of the map, by default it is read with ``r.info``
+    """
+    # lazy import
+    import numpy as np
+
+    datatype = raster_datatype(sess, name) if datatype is None else datatype
+    dtype, flags, nbytes = DATATYPES[datatype]
+    if null is None:
+        null = "nan" if flags == "f" else np.iinfo(np.int32).min
+    env = sess.env
+    if region is None:
+        region = sess.get_region()
+    else:
+        env = dict(env, GRASS_REGION=format_region(region))
+    output = sess.mkstemp(suffix=".bin")
+    cmd = dict(
+        flags=flags, input=name, output=output, bytes=nbytes, null=null, order="native"
+    )
+    sess.run_command("r.out.bin", env=env, **cmd)
+    array = np.memmap(
+        output, dtype=dtype, mode=mode, shape=(region["rows"], region["cols"])
+    )
+    array.region = region
+    return array
+
+
+def write_raster(sess, array, name, region=None, null=None, overwrite=False):
+    """Import a 2D array as raster map writing it to a binary file.
+
+    The array must have the same number of rows and columns of the region,
+    int arrays are imported as CELL, float32 arrays as FCELL and the other
+    arrays as DCELL.
+
+    Parameters
+    ----------
+    sess : Session
+        An opened session
+    array : array-like
+        Array with the values of the cells
+    name : string
+        Name of the new raster map
+    region : dict
+        Region of the array, by default the current region
+    null : number
+        Value of the cells to be imported as null
+    overwrite : bool
+        Overwrite an existing map
+    """
+    # lazy import
+    import numpy as np
+
+    array = np.asarray(array)
+    region = sess.get_region() if region is None else region
+    if array.shape != (region["rows"], region["cols"]):
+        raise ValueError(
+            "The array shape {} does not match the region ({}, {})".format(
+                array.shape, region["rows"], region["cols"]
+            )
+        )
+    if array.dtype.kind in "iub":
+        dtype, flags, nbytes = "int32", "s", 4
+    elif array.dtype == np.float32:
+        dtype, flags, nbytes = "float32", "f", 4
+    else:
+        dtype, flags, nbytes = "float64", "d", 8
+    path = sess.mkstemp(suffix=".bin")
+    try:
+        np.ascontiguousarray(array, dtype=dtype).tofile(path)
+        sess.run_command(
+            "r.in.bin",
+            flags=flags,
+            input=path,
+            output=name,
+            bytes=nbytes,
+            order="native",
+            north=region["north"],
+            south=region["south"],
+            east=region["east"],
+            west=region["west"],
+            rows=region["rows"],
+            cols=region["cols"],
+            anull=null,
+            overwrite=overwrite,
+        )
+    finally:
+        os.remove(path)
+
+
+def tile_regions(region, tile_rows, tile_cols, overlap=0):
+    """Split a region in tiles, yield the tuples ``(row, col, region)`` with
+    the position of the first cell of the tile, not considering the overlap,
+    and the region of the tile.
+
+    The tiles are extended by `overlap` cells on each side, the extension is
+    clipped to the borders of the region.
+    """
+    if tile_rows < 1 or tile_cols < 1 or overlap < 0:
+        raise ValueError("Invalid tile size or overlap")
+    rows, cols = region["rows"], region["cols"]
+    nsres = (region["north"] - region["south"]) / float(rows)
+    ewres = (region["east"] - region["west"]) / float(cols)
+    for row in range(0, rows, tile_rows):
+        top = max(row - overlap, 0)
+        bottom = min(row + tile_rows + overlap, rows)
+        for col in range(0, cols, tile_cols):
+            left = max(col - overlap, 0)
+            right = min(col + tile_cols + overlap, cols)
+            tile = OrderedDict(region)
+            tile["north"] = region["north"] - top * nsres
+            tile["south"] = region["north"] - bottom * nsres
+            tile["west"] = region["west"] + left * ewres
+            tile["east"] = region["west"] + right * ewres
+            tile["rows"] = bottom - top
+            tile["cols"] = right - left
+            yield row, col, tile
+
+
+def _remove(array):
+    """Remove the file of a tile, the mapped memory stays valid on POSIX."""
+    try:
+        os.remove(array.filename)
+    except OSError:
+        # the file is still in use (Windows), it is removed with the session
+        pass
+
+
+class _Prefetch(threading.Thread):
+    """Export a tile in a background thread."""
+
+    def __init__(self, func, *args):
+        super(_Prefetch, self).__init__()
+        self.daemon = True
+        self.func, self.args = func, args
+        self.result = self.error = None
+        self.start()
+
+    def run(self):
+        try:
+            self.result = self.func(*self.args)
+        except Exception as exc:
+            self.error = exc
+
+    def get(self):
+        self.join()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def iter_tiles(
+    sess, name, tile_rows, tile_cols, overlap=0, prefetch=False, region=None, null=None
+):
+    """Yield a raster map tile by tile as ``numpy.memmap`` arrays.
+
+    Each tile is exported with its own region passed through ``GRASS_REGION``,
+    so the region of the mapset is never changed and the memory used does not
+    depend on the size of the map. The file of a tile is removed when the
+    following tile is requested, copy the array to keep it.
+
+    Besides the ``region`` attribute, each tile has an ``offset`` attribute
+    with the position of its first cell in the whole region and a ``core``
+    attribute with the slices selecting the cells without the overlap.
+
+    Parameters
+    ----------
+    sess : Session
+        An opened session
+    name : string
+        Name of the raster map
+    tile_rows, tile_cols : int
+        Number of rows and columns of the tiles
+    overlap : int
+        Number of cells shared with the neighbouring tiles
+    prefetch : bool
+        Export the next tile in a background thread while the current one
+        is processed
+    region : dict
+        Region to split, by default the current region
+    null : number
+        Value of the null cells, see `read_raster`
+    """
+    region = sess.get_region() if region is None else region
+    datatype = raster_datatype(sess, name)
+
+    def export(tile_region):
+        return read_raster(
+            sess, name, region=tile_region, null=null, datatype=datatype
+        )
+
+    tiles = list(tile_regions(region, tile_rows, tile_cols, overlap=overlap))
+    pending = None
+    try:
+        for index, (row, col, tile_region) in enumerate(tiles):
+            if pending is None:
+                array = export(tile_region)
+            else:
+                array, pending = pending.get(), None
+            if prefetch and index + 1 < len(tiles):
+                pending = _Prefetch(export, tiles[index + 1][2])
+            top, left = min(row, overlap), min(col, overlap)
+            array.offset = (row - top, col - left)
+            array.core = (
+                slice(top, top + min(tile_rows, region["rows"] - row)),
+                slice(left, left + min(tile_cols, region["cols"] - col)),
+            )
+            try:
+                yield array
+            finally:
+                _remove(array)
+    finally:
+        if pending is not None:
+            try:
+                _remove(pending.get())
+            except Exception:
+                pass
@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Registry of the GRASS GIS installations available on the PATH.
+
+The launchers (``grass``, ``grass78``, ``grass84``, ...) are discovered once,
+the GISBASE and the environment of each installation are computed the first
+time that the installation is used, afterwards switching the active
+installation of the process only applies and restores a precomputed
+`EnvDiff`.
+"""
+import contextlib
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from grass_session.session import (
+    get_grass_gisbase,
+    get_platform_name,
+    grass_env_diff,
+    is_executable,
+)
+
+LAUNCHER = re.compile(r"^grass(?P<version>\d[\d.]*)?(\.exe|\.bat|\.py)?$")
+
+
+class GrassInstallation(object):
+    def __init__(self, grassbin, version=""):
+        """A GRASS GIS installation, identified by the path of its launcher.
+        """
+        self.grassbin = grassbin
+        self.version = version
+        self._gisbase = None
+        self._diff = None
+        self._lock = threading.Lock()
+
+    @property
+    def name(self):
+        return "grass{}".format(self.version)
+
+    @property
+    def gisbase(self):
+        """GISBASE of the installation, computed once."""
+        if self._gisbase is None:
+            self._gisbase = get_grass_gisbase(grassbin=self.grassbin)
+        return self._gisbase
+
+    @property
+    def diff(self):
+        """`EnvDiff` with the variables and the paths of the installation."""
+        with self._lock:
+            if self._diff is None:
+                diff = grass_env_diff(gisbase=self.gisbase)
+                diff.variables["GRASSBIN"] = self.grassbin
+                self._diff = diff
+            return self._diff
+
+    def sort_key(self):
+        return tuple(int(digit) for digit in re.sub(r"\D", "", self.version))
+
+    def __repr__(self):
+        return "GrassInstallation({!r}, version={!r})".format(
+            self.grassbin, self.version
+        )
+
+
+class GrassRegistry(object):
+    def __init__(self, path=None):
+        """Discover the GRASS GIS launchers available on the PATH and switch
+        the installation used by the process.
+
+        Parameters
+        ----------
+        path : string
+            Directories where the launchers are searched, by default the
+            ``PATH`` environmental variable
+
+        Examples
+        --------
+        >>> registry = GrassRegistry()
+        >>> [inst.name for inst in registry.installations()]
+        ['grass78', 'grass84', 'grass']
+        >>> with registry.using("78") as grass78:
+        ...     with Session(gisdb=TMPDIR, location="loc",
+        ...                  grassbin=grass78.grassbin):
+        ...         pass
+        """
+        self.path = path
+        self._installations = None
+        self._active = None
+        self._snapshot = None
+        self._lock = threading.RLock()
+
+    def discover(self, refresh=False):
+        """Return an ordered dictionary with the installations by name, the
+        PATH is scanned only the first time or if `refresh` is True."""
+        with self._lock:
+            if self._installations is not None and not refresh:
+                return self._installations
+            path = os.environ.get("PATH", "") if self.path is None else self.path
+            platform = get_platform_name()
+            found = {}
+            for dname in path.split(os.pathsep):
+                if not dname or not os.path.isdir(dname):
+                    continue
+                for fname in sorted(os.listdir(dname)):
+                    match = LAUNCHER.match(fname)
+                    if match is None:
+                        continue
+                    version = match.group("version") or ""
+                    fpath = os.path.join(dname, fname)
+                    # the first launcher on the PATH wins
+                    if version not in found and is_executable(fpath, platform):
+                        found[version] = GrassInstallation(fpath, version)
+            self._installations = OrderedDict(
+                (inst.name, inst)
+                for inst in sorted(
+                    found.values(), key=lambda inst: (not inst.version, inst.sort_key())
+                )
+            )
+            return self._installations
+
+    def installations(self):
+        """Return the list of the installations, sorted by version."""
+        return list(self.discover().values())
+
+    def get(self, version=None):
+        """Return the installation of a version: the exact launcher name
+        (e.g. ``78`` for ``grass78``) or the latest one starting with
+        `version` (e.g. ``8``). Without a version return the ``grass``
+        launcher or the latest version."""
+        installations = self.discover()
+        version = "" if version is None else str(version).replace(".", "")
+        name = "grass{}".format(version)
+        if name in installations:
+            return installations[name]
+        candidates = [
+            inst
+            for inst in installations.values()
+            if inst.version.replace(".", "").startswith(version)
+        ]
+        if not candidates:
+            raise RuntimeError(
+                "Cannot find GRASS GIS start script: '{}' on the PATH".format(name)
+            )
+        return max(candidates, key=lambda inst: inst.sort_key())
+
+    @property
+    def active(self):
+        """The active installation or None."""
+        return self._active
+
+    def _other_paths(self, inst):
+        """Return the path-list entries of the other installations."""
+        paths = {}
+        for other in self.discover().values():
+            if other is inst:
+                continue
+            for key, entries in other.diff.paths.items():
+                paths.setdefault(key, []).extend(entries)
+        return paths
+
+    def activate(self, version=None):
+        """Set the installation used by the process: its variables are set in
+        ``os.environ`` and its python path in ``sys.path``, the changes of the
+        previous active installation are undone.
+
+        The paths of the installation are placed before the existing entries
+        of ``PATH``, ``LD_LIBRARY_PATH`` and ``PYTHONPATH`` and the paths of
+        the other installations of the registry (e.g. the GRASS set up when
+        importing `grass_session`) are removed, so the modules and the shared
+        libraries are found in the active installation."""
+        inst = version if isinstance(version, GrassInstallation) else self.get(version)
+        diff = inst.diff
+        with self._lock:
+            others = self._other_paths(inst)
+            if self._snapshot is not None:
+                self._snapshot.restore()
+            self._snapshot = diff.apply(os.environ, prepend=True, exclude=others)
+            self._active = inst
+        return inst
+
+    def deactivate(self):
+        """Restore the environment and ``sys.path`` as they were before the
+        activation."""
+        with self._lock:
+            if self._snapshot is not None:
+                self._snapshot.restore()
+            self._snapshot = self._active = None
+
+    @contextlib.contextmanager
+    def using(self, version=None):
+        """Activate an installation in a ``with`` block, the previous active
+        installation is restored at the end."""
+        with self._lock:
+            previous = self._active
+        inst = self.activate(version)
+        try:
+            yield inst
+        finally:
+            if previous is None:
+                self.deactivate()
+            else:
+                self.activate(previous)
+
+
+_REGISTRY = None
+
+
+def get_registry():
+    """Return the registry of the installations on the PATH."""
+    global _REGISTRY
+    if _REGISTRY is None:
+        _REGISTRY = GrassRegistry()
+    return _REGISTRY
@@ -8,11 +8,17 @@ Created on Fri Dec  1 18:36:22 2017
 from __future__ import print_function
 
 import atexit
+import contextlib
 import os
 import shutil
 import subprocess
 import sys
 import tempfile as tmpfile
+from collections import OrderedDict
+
+from grass_session import cache, timing
+from grass_session.env import EnvDiff, EnvSnapshot, split_paths
+from grass_session.libs import load_libs
 
 if sys.version_info[0] >= 3:
     from shutil import which
@@ -111,10 +117,90 @@ def get_grass_bin(version=None):
         )
 
 
+_GISBASE_CACHE = {}
+DISCOVERY_CACHE = "discovery.json"
+
+
+def _discovery_key(grassbin):
+    """Return a string identifying the GRASS launcher, the key changes when
+    the launcher file is modified or replaced. Return None if the launcher
+    cannot be resolved."""
+    grassbin = str(grassbin)
+    path = grassbin if os.path.dirname(grassbin) else which(grassbin)
+    if not path:
+        return None
+    path = os.path.realpath(path)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    mtime = getattr(st, "st_mtime_ns", st.st_mtime)
+    return "{path}|{mtime}|{ino}|{size}|{env}".format(
+        path=path,
+        mtime=mtime,
+        ino=st.st_ino,
+        size=st.st_size,
+        env=os.environ.get("GRASSBIN", ""),
+    )
+
+
+def clear_grass_gisbase_cache(persistent=False):
+    """Clear the in-process cache of the GRASS GISBASE paths, if
+    ``persistent`` is True remove also the discovery cache on disk."""
+    _GISBASE_CACHE.clear()
+    if persistent:
+        try:
+            os.remove(cache.get_cache_path(DISCOVERY_CACHE))
+        except OSError:
+            pass
+
+
 def get_grass_gisbase(grassbin=None):
-    """Return the GRASS GISBASE path"""
+    """Return the GRASS GISBASE path.
+
+    The path is memoized in the process and stored in the user cache
+    directory, the cached value is reused until the launcher file changes.
+    Set ``GRASS_SESSION_NO_CACHE=1`` to skip the persistent cache."""
     grassbin = get_grass_bin() if grassbin is None else grassbin
+    key = _discovery_key(grassbin)
+    if key is None:
+        return _grass_config_path(grassbin)
+    gisbase = _get_cached_gisbase(key)
+    if gisbase is None:
+        gisbase = _grass_config_path(grassbin)
+        _set_cached_gisbase(key, gisbase)
+    return gisbase
+
+
+def _get_cached_gisbase(key):
+    """Return the cached GISBASE or None."""
+    gisbase = _GISBASE_CACHE.get(key)
+    if gisbase is not None and os.path.exists(gisbase):
+        return gisbase
+
+    if cache.is_cache_enabled():
+        gisbase = cache.read_json(DISCOVERY_CACHE, default={}).get(key)
+        if gisbase is not None and os.path.exists(gisbase):
+            _GISBASE_CACHE[key] = gisbase
+            return gisbase
+
+
+def _set_cached_gisbase(key, gisbase):
+    """Store the GISBASE in the process and in the persistent cache."""
+    _GISBASE_CACHE[key] = gisbase
+    if cache.is_cache_enabled():
+        discovered = cache.read_json(DISCOVERY_CACHE, default={})
+        # drop the entries of the launchers that have been modified
+        path = key.split("|", 1)[0] + "|"
+        discovered = {k: v for k, v in discovered.items() if not k.startswith(path)}
+        discovered[key] = gisbase
+        cache.write_json(DISCOVERY_CACHE, discovered)
+
+
+def _grass_config_path(grassbin):
+    """Execute the GRASS launcher and return the GISBASE path"""
     cmd = "{grassbin} --config path".format(grassbin=grassbin)
+    timing.count_subprocess()
     proc = subprocess.Popen(
         cmd,
         shell=True,
@@ -127,13 +213,6 @@ def get_grass_gisbase(grassbin=None):
         print("cmd:", cmd)
         print("out:", out)
         print("err:", err)
-        proc = subprocess.Popen(
-            cmd,
-            shell=True,
-            env=ORIGINAL_ENV,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
         raise RuntimeError(
             (
                 "Cannot find GRASS GIS start script: {grassbin}, "
@@ -152,105 +231,119 @@ def get_grass_gisbase(grassbin=None):
     return gisbase
 
 
-def set_grass_path_env(gisbase=None, env=None, grassbin=None):
-    """Return a dictionary with the modified environmental variables."""
+def grass_env_diff(gisbase=None, env=None, grassbin=None):
+    """Return an `EnvDiff` with the variables, the ordered path entries and
+    the python path required by a GRASS installation."""
     env = os.environ if env is None else env
     gisbase = gisbase if gisbase else get_grass_gisbase(grassbin=grassbin)
-    # Set GISBASE environment variable
-    env["GISBASE"] = gisbase
-
-    grass_bin = os.path.join(gisbase, "bin")
-    if "PATH" in env:
-        if grass_bin not in env["PATH"]:
-            env["PATH"] += os.pathsep + grass_bin
-    else:
-        env["PATH"] = grass_bin
-
-    if os.path.join(gisbase, "scripts") not in env["PATH"]:
-        env["PATH"] += os.pathsep + os.path.join(gisbase, "scripts")
-
-    # add path to GRASS addons
     home = os.path.expanduser("~")
-    if os.path.join(home, ".grass7", "addons", "scripts") not in env["PATH"]:
-        env["PATH"] += os.pathsep + os.path.join(home, ".grass7", "addons", "scripts")
-
+    pyversion = sys.version_info[0]
+    platform = get_platform_name()
+    variables = OrderedDict([("GISBASE", gisbase)])
+
+    paths = [
+        os.path.join(gisbase, "bin"),
+        os.path.join(gisbase, "scripts"),
+        # add path to GRASS addons
+        os.path.join(home, ".grass7", "addons", "scripts"),
+    ]
     # add paths to custom GRASS addons
     if "GRASS_ADDON_PATH" in env:
-        for addon_path in env["GRASS_ADDON_PATH"].split(os.pathsep):
-            if addon_path not in env["PATH"]:
-                env["PATH"] += os.pathsep + addon_path
-
-    pyversion = sys.version_info[0]
+        paths.extend(split_paths(env["GRASS_ADDON_PATH"]))
 
-    platform = get_platform_name()
     if platform == "win32":
-        config_dirname = "GRASS7"
-        config_dir = os.path.join(os.getenv("APPDATA"), config_dirname)
-        if os.path.join(gisbase, "extrabin") not in env["PATH"]:
-            env["PATH"] += os.pathsep + os.path.join(gisbase, "extrabin")
-        env["GRASS_PYTHON"] = env.get("GRASS_PYTHON", "python{}.exe".format(pyversion))
-        env["GRASS_SH"] = os.path.join(gisbase, "msys", "bin", "sh.exe")
+        config_dir = os.path.join(os.getenv("APPDATA"), "GRASS7")
+        paths.append(os.path.join(gisbase, "extrabin"))
+        python = "python{}.exe".format(pyversion)
+        variables["GRASS_SH"] = os.path.join(gisbase, "msys", "bin", "sh.exe")
     else:
-        config_dirname = ".grass7"
-        config_dir = os.path.join(home, config_dirname)
-        env["GRASS_PYTHON"] = env.get("GRASS_PYTHON", "python{}".format(pyversion))
+        config_dir = os.path.join(home, ".grass7")
+        python = "python{}".format(pyversion)
+    if "GRASS_PYTHON" not in env:
+        variables["GRASS_PYTHON"] = python
 
     addon_base = os.path.join(config_dir, "addons")
-    env["GRASS_ADDON_BASE"] = addon_base
-    if os.path.join(addon_base, "bin") not in env["PATH"]:
-        env["PATH"] += os.pathsep + os.path.join(addon_base, "bin")
+    variables["GRASS_ADDON_BASE"] = addon_base
+    paths.append(os.path.join(addon_base, "bin"))
     if platform != "win32":
-        if os.path.join(addon_base, "scripts") not in env["PATH"]:
-            env["PATH"] += os.pathsep + os.path.join(addon_base, "scripts")
-
-    # define LD_LIBRARY_PATH
-    ld_path = os.path.join(gisbase, "lib")
-    if "LD_LIBRARY_PATH" not in env:
-        env["LD_LIBRARY_PATH"] = ld_path
-    else:
-        if env["LD_LIBRARY_PATH"] == "":
-            env["LD_LIBRARY_PATH"] = ld_path
-        elif ld_path not in env["LD_LIBRARY_PATH"]:
-            env["LD_LIBRARY_PATH"] += os.pathsep + ld_path
+        paths.append(os.path.join(addon_base, "scripts"))
 
-    # define GRASS-Python path variable
-    pypath = env.get("PYTHONPATH", "")
     grasspy = os.path.join(gisbase, "etc", "python")
-    if grasspy not in pypath:
-        env["PYTHONPATH"] = pypath + os.pathsep + grasspy if pypath else grasspy
-    if grasspy not in sys.path:
-        sys.path.insert(0, grasspy)
-
-    env["LANG"] = "en_US.UTF-8"
-    env["LOCALE"] = "en_US.UTF-8"
-    env["LC_ALL"] = "en_US.UTF-8"
+    for key in ("LANG", "LOCALE", "LC_ALL"):
+        variables[key] = "en_US.UTF-8"
+    return EnvDiff(
+        variables=variables,
+        paths=OrderedDict(
+            [
+                ("PATH", paths),
+                ("LD_LIBRARY_PATH", [os.path.join(gisbase, "lib")]),
+                ("PYTHONPATH", [grasspy]),
+            ]
+        ),
+        syspath=[grasspy],
+    )
+
+
+def set_grass_path_env(gisbase=None, env=None, grassbin=None):
+    """Return a dictionary with the modified environmental variables.
+
+    The GRASS paths are appended only if they are not already entries of the
+    path-lists; use `grass_env_diff` to get a snapshot restoring the
+    previous environment."""
+    env = os.environ if env is None else env
+    grass_env_diff(gisbase=gisbase, env=env, grassbin=grassbin).apply(env)
     return env
 
 
 def clean_grass_path_env(gisbase=None, env=None, grassbin=None):
-    """Remove GRASS version related variables from the environment."""
+    """Remove the GRASS paths from the path-list variables of the
+    environment."""
     env = os.environ if env is None else env
-    gisbase = gisbase if gisbase else get_grass_gisbase(grassbin=grassbin)
-
-    grass_bin = os.path.join(gisbase, "bin")
-    # Remove from PATH
-    env["PATH"] = env["PATH"].replace(os.pathsep + grass_bin, "")
-    env["PATH"] = env["PATH"].replace(os.pathsep + os.path.join(gisbase, "scripts"), "")
+    return grass_env_diff(gisbase=gisbase, env=env, grassbin=grassbin).remove(env)
 
-    # Remove from LD_LIBRARY_PATH
-    ld_path = os.path.join(gisbase, "lib")
-    env["LD_LIBRARY_PATH"] = env["LD_LIBRARY_PATH"].replace(os.pathsep + ld_path, "")
 
-    # Remove from PYTHONPATH
-    grasspy = os.path.join(gisbase, "etc", "python")
-    env["PYTHONPATH"] = env["PYTHONPATH"].replace(grasspy, "")
-    env["PYTHONPATH"] = env["PYTHONPATH"].replace(os.pathsep + os.pathsep, os.pathsep)
+def isolated_env(env=None):
+    """Return a private copy of the environment without the variables of
+    an opened GRASS session."""
+    env = dict(os.environ if env is None else env)
+    for key in ("GISRC", "GIS_LOCK"):
+        env.pop(key, None)
     return env
 
 
-def write_gisrc(gisdb, location, mapset):
-    """Write the ``gisrc`` file and return its path."""
-    gisrc = tmpfile.mktemp()
+def make_command(
+    module, flags="", overwrite=False, quiet=False, verbose=False, **options
+):
+    """Return the list of arguments to execute a GRASS module.
+
+    Options with a ``None`` value are skipped, lists and tuples are joined
+    with commas and a trailing underscore is removed from the option names
+    (e.g. ``lambda_``).
+
+    >>> make_command("g.region", flags="p", raster=["a", "b"], res=10)
+    ['g.region', '-p', 'raster=a,b', 'res=10']
+    """
+    cmd = [module]
+    if flags:
+        cmd.append("-{}".format(flags))
+    if overwrite:
+        cmd.append("--o")
+    if quiet:
+        cmd.append("--q")
+    if verbose:
+        cmd.append("--v")
+    for key, value in sorted(options.items()):
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple)):
+            value = ",".join(str(val) for val in value)
+        cmd.append("{}={}".format(key.rstrip("_"), value))
+    return cmd
+
+
+def write_gisrc(gisdb, location, mapset, dir=None):
+    """Write the ``gisrc`` file (in `dir` if given) and return its path."""
+    gisrc = tmpfile.mktemp(dir=dir)
     with open(gisrc, "w") as rc:
         rc.write(
             "GISDBASE: {}\nLOCATION_NAME: {}\nMAPSET: {}"
@@ -259,7 +352,16 @@ def write_gisrc(gisdb, location, mapset):
     return gisrc
 
 
-def grass_init(gisbase, gisdb, location, mapset="PERMANENT", env=None, loadlibs=False):
+def grass_init(
+    gisbase,
+    gisdb,
+    location,
+    mapset="PERMANENT",
+    env=None,
+    loadlibs=False,
+    timings=None,
+    gisrc_dir=None,
+):
     """Initialize system variables to run GRASS modules
 
     This function is for running GRASS GIS without starting it
@@ -289,6 +391,8 @@ def grass_init(gisbase, gisdb, location, mapset="PERMANENT", env=None, loadlibs=
     :param dbase: path to GRASS database (default: '')
     :param location: location name (default: 'demolocation')
     :param mapset: mapset within given location (default: 'PERMANENT')
+    :param timings: optional `Timings` instance to measure the phases
+    :param gisrc_dir: directory of the ``gisrc`` file (default: temp dir)
 
     :returns: path to ``gisrc`` file (to be deleted later)
     """
@@ -306,16 +410,66 @@ def grass_init(gisbase, gisdb, location, mapset="PERMANENT", env=None, loadlibs=
     # permanent = os.listdir(os.path.join(gisdb, location, "PERMANENT"))
     # mapset = os.listdir(os.path.join(gisdb, location, mapset))
     if loadlibs:
-        load_libs(env["GISBASE"])
-    env["GISRC"] = write_gisrc(gisdb, location, mapset)
+        with timing.phase(timings, "load_libs"):
+            load_libs(env["GISBASE"])
+    with timing.phase(timings, "write_gisrc"):
+        env["GISRC"] = write_gisrc(gisdb, location, mapset, dir=gisrc_dir)
     return env
 
 
-def grass_create(grassbin, path, create_opts):
-    """Create a new location/mapset"""
+DEFAULT_VAR = (
+    "DB_DRIVER: sqlite\n"
+    "DB_DATABASE: $GISDBASE/$LOCATION_NAME/$MAPSET/sqlite/sqlite.db\n"
+)
+
+
+def can_create_mapset(path):
+    """Return True if `path` is a new mapset of an existing location."""
+    location = os.path.dirname(os.path.normpath(str(path)))
+    return not os.path.exists(str(path)) and os.path.isfile(
+        os.path.join(location, "PERMANENT", "DEFAULT_WIND")
+    )
+
+
+def create_mapset(path):
+    """Create a new mapset in an existing location without executing the
+    GRASS launcher: the default region of PERMANENT is copied as the mapset
+    region and the default sqlite database connection is set."""
+    path = os.path.normpath(str(path))
+    permanent = os.path.join(os.path.dirname(path), "PERMANENT")
+    default_wind = os.path.join(permanent, "DEFAULT_WIND")
+    if not os.path.isfile(default_wind):
+        raise RuntimeError(
+            "Cannot create: {path}, {wind} does not exist.".format(
+                path=path, wind=default_wind
+            )
+        )
+    os.mkdir(path)
+    # use the same permissions of PERMANENT
+    shutil.copymode(permanent, path)
+    shutil.copy(default_wind, os.path.join(path, "WIND"))
+    var = os.path.join(permanent, "VAR")
+    if os.path.isfile(var):
+        shutil.copy(var, os.path.join(path, "VAR"))
+    else:
+        with open(os.path.join(path, "VAR"), "w") as fvar:
+            fvar.write(DEFAULT_VAR)
+    os.mkdir(os.path.join(path, "sqlite"))
+
+
+def grass_create(grassbin, path, create_opts, native=True):
+    """Create a new location/mapset.
+
+    If `native` is True and `path` is a new mapset of an existing location
+    (``create_opts=""``) the mapset is created with `create_mapset`, without
+    executing the GRASS launcher."""
+    if native and create_opts == "" and can_create_mapset(path):
+        create_mapset(path)
+        return
     cmd = '{grassbin} -c {create_opts} -e "{path}"'.format(
         grassbin=grassbin, create_opts=create_opts, path=path
     )
+    timing.count_subprocess()
     proc = subprocess.Popen(
         cmd,
         shell=True,
@@ -335,44 +489,33 @@ def grass_create(grassbin, path, create_opts):
         )
 
 
-def load_libs(gisbase=None):
-    # lazy import
-    from glob import glob
-    import ctypes
-
-    # define LD_LIBRARY_PATH
-    gisbase = os.environ["GISBASE"] if not gisbase else gisbase
-    if not gisbase:
-        raise RuntimeError("No gisbase supplied!")
-    ld_path = os.path.join(gisbase, "lib")
-    lib_suffix = "dll" if sys.platform == "win32" else "so"
-    print("Loading libraries from {}".format(ld_path))
-    remains = []
-    grasslibs = glob("{}{}*.{}".format(ld_path, os.path.sep, lib_suffix))
-    if len(grasslibs) == 0:
-        raise RuntimeError("No GRASS GIS libraries found in {}.".format(ld_path))
-    for lib in grasslibs:
-        try:
-            ctypes.CDLL(lib, mode=1)
-        except Exception:
-            remains.append(lib)
+def free_space(path):
+    """Return the number of bytes available in the file system of `path`."""
+    if hasattr(shutil, "disk_usage"):
+        return shutil.disk_usage(path).free
+    stat = os.statvfs(path)
+    return stat.f_bavail * stat.f_frsize
 
-    tries_max = len(remains)
-    tries = 1
-    while len(remains) > 0 and tries < tries_max:
-        tries += 1
-        for lib in remains:
-            try:
-                ctypes.CDLL(lib, mode=1)
-                remains.remove(lib)
-            except Exception as exc:
-                if tries == tries_max:
-                    print(exc)
 
-    if len(remains) > 0:
-        raise RuntimeError(
-            "Cannot load all the following GRASS GIS libraries from {}!".format(remains)
-        )
+SCRATCH_MIN_FREE = 64 * 2 ** 20
+
+
+def get_scratch_dir(candidates, min_free=SCRATCH_MIN_FREE):
+    """Return the first writable directory of `candidates` with at least
+    `min_free` bytes available, falling back to the default temporary
+    directory."""
+    if not isinstance(candidates, (list, tuple)):
+        candidates = [candidates]
+    for path in candidates:
+        path = str(path)
+        try:
+            if not os.path.isdir(path):
+                os.makedirs(path)
+            if os.access(path, os.W_OK) and free_space(path) >= min_free:
+                return path
+        except OSError:
+            continue
+    return tmpfile.gettempdir()
 
 
 class Session(object):
@@ -389,6 +532,35 @@ class Session(object):
             Mapset name
         env : dict
             Dictionary to set environmental variable for the session
+        isolated : bool
+            If True and `env` is not given the session uses a private copy
+            of `os.environ`, the GRASS modules must be executed through the
+            `run_command`/`read_command` methods or passing `env=sess.env`.
+            The ``sys.path`` of the process is not modified, so the GRASS
+            python libraries cannot be imported through the session
+        templates : bool or LocationTemplates
+            Clone the new locations from a cache of location templates, if
+            True the default cache is used (see also the
+            ``GRASS_SESSION_TEMPLATES`` environmental variable)
+        timings : bool
+            Measure the wall time and the number of processes of each phase
+            of the session in the `timings` attribute, by default the
+            ``GRASS_SESSION_TIMINGS`` environmental variable is used
+        scratch_dir : path or list of paths
+            Fast local storage (e.g. ``/dev/shm``) for the temporary state of
+            the session: the ``gisrc`` file, ``TMPDIR`` and the GRASS
+            temporary files (``GRASS_TMPDIR_MAPSET=0``) are placed in a
+            private directory removed when the session is closed. The first
+            directory with at least `scratch_min_free` bytes available is
+            used, otherwise the default temporary directory
+        scratch_min_free : int
+            Minimum free space required in the scratch directory, by default
+            64 MiB
+        memoize : bool
+            Cache the output of the query modules (``g.proj``, ``g.region``,
+            ``g.gisenv``, ``r.info``, ``v.info``, ``g.list``) executed with
+            `read_command`, the outputs are reused until the files read by
+            the module change, see `QueryCache`
 
         Examples
         --------
@@ -400,25 +572,74 @@ class Session(object):
         ...     print("\nPROJ")
         ...     print(parse_command("g.proj", flags="g"))
 
+        Run sessions on different mapsets in parallel threads
+
+        >>> def info(mapset):
+        ...     with Session(gisdb=TMPDIR, location="loc", mapset=mapset,
+        ...                  isolated=True) as sess:
+        ...         return sess.read_command("g.gisenv", get="MAPSET")
+        >>> with ThreadPoolExecutor(4) as executor:
+        ...     print(list(executor.map(info, ["m1", "m2", "m3", "m4"])))
+
         """
+        isolated = self.isolated = kwopen.pop("isolated", False)
+        if env is None and isolated:
+            env = isolated_env()
         self.env = os.environ if env is None else env
-        self.grassbin = (
-            get_grass_bin(version=grassversion) if grassbin is None else grassbin
+        self.gisdb = self.location = self.mapset = None
+        self._tmpdir = None
+        self.scratch_dir = kwopen.pop("scratch_dir", None)
+        self.scratch_min_free = kwopen.pop("scratch_min_free", SCRATCH_MIN_FREE)
+        self.lock = None
+        self.memo = None
+        if kwopen.pop("memoize", False):
+            # lazy import
+            from grass_session.memo import QueryCache
+
+            self.memo = QueryCache(self)
+        self.templates = kwopen.pop("templates", None)
+        timings = kwopen.pop("timings", None)
+        self.timings = timing.Timings(
+            enabled=timing.is_enabled() if timings is None else timings
         )
-        self.gisbase = get_grass_gisbase(grassbin=self.grassbin)
-        self.env = set_grass_path_env(gisbase=self.gisbase, env=self.env)
+        with self.timings.phase("get_grass_bin"):
+            self.grassbin = (
+                get_grass_bin(version=grassversion) if grassbin is None else grassbin
+            )
+        with self.timings.phase("get_grass_gisbase"):
+            self.gisbase = get_grass_gisbase(grassbin=self.grassbin)
+        with self.timings.phase("set_grass_path_env"):
+            self._env_snapshot = self._set_grass_path_env()
+        self._open_snapshot = None
+        self._gisrc = None
         self._aopen = aopen
         self._kwopen = kwopen
 
+    def _set_grass_path_env(self):
+        """Set the GRASS paths in the session environment and return the
+        snapshot to restore it, an isolated session does not modify the
+        ``sys.path`` of the process."""
+        diff = grass_env_diff(gisbase=self.gisbase, env=self.env)
+        return diff.apply(self.env, syspath=not self.isolated)
+
     def open(
-        self, gisdb, location, mapset=None, create_opts=None, env=None, loadlibs=False
+        self,
+        gisdb,
+        location,
+        mapset=None,
+        create_opts=None,
+        env=None,
+        loadlibs=False,
+        lock=False,
+        lock_timeout=None,
     ):
         """Open or create GRASS GIS mapset.
 
         Parameters
         ----------
-        gisdb : string, path-like
-            Path to the GISDB directory
+        gisdb : string, path-like or GisDB
+            Path to the GISDB directory, with a `GisDB` index the location
+            and the mapset are validated without scanning the directories
         location : string
             Location name
         mapset : string
@@ -428,6 +649,13 @@ class Session(object):
             (`[-c | -c geofile | -c EPSG:code[:datum_trans] | -c XY]`)
         env : dict
             Dictionary to set environmental variable for the session
+        lock : bool or string
+            Lock the mapset while the session is opened: ``"shared"`` for a
+            read-only access shared with other readers, ``"exclusive"`` (or
+            True) to be the only process using the mapset, see `MapsetLock`
+        lock_timeout : float
+            Maximum number of seconds to wait for the lock, a
+            `MapsetLockError` is raised if the lock is not acquired
 
         Examples
         --------
@@ -444,19 +672,100 @@ class Session(object):
         >>> sess.close()
 
         """
+        # lazy import
+        from grass_session.gisdb import GisDB
+
         env = self.env if env is None else env
+        if env is self.env and self._env_snapshot is None:
+            # the session has been closed, set the GRASS paths again
+            self._env_snapshot = self._set_grass_path_env()
         mapset = "PERMANENT" if mapset is None else mapset
-        lpath = os.path.join(gisdb, location)
+        index = gisdb if isinstance(gisdb, GisDB) else None
+        if index is not None:
+            gisdb = index.path
+        self.gisdb, self.location, self.mapset = gisdb, location, mapset
         mpath = os.path.join(gisdb, location, mapset)
         if create_opts is not None:
-            if mapset == "PERMANENT" and not os.path.exists(lpath):
-                path = lpath
-            else:
-                path = mpath
-            self.create(path, create_opts=create_opts)
-        return grass_init(
-            self.gisbase, gisdb, location, mapset, env=env, loadlibs=loadlibs
-        )
+            self._create_target(index, gisdb, location, mapset, create_opts)
+        if index is not None:
+            index.validate(location, mapset)
+        if lock:
+            self.lock_mapset(mpath, lock, timeout=lock_timeout)
+        try:
+            return self._init(env, gisdb, location, mapset, loadlibs)
+        except Exception:
+            # do not keep other processes out of the mapset
+            self._release_lock()
+            raise
+
+    def _create_target(self, index, gisdb, location, mapset, create_opts):
+        """Create the location (or the mapset if the location exists), the
+        `GisDB` index is used and updated if not None."""
+        lpath = os.path.join(gisdb, location)
+        if index is not None:
+            exists = index.exists(location)
+        else:
+            exists = os.path.exists(lpath)
+        if mapset == "PERMANENT" and not exists:
+            path = lpath
+        else:
+            path = os.path.join(lpath, mapset)
+        self.create(path, create_opts=create_opts)
+        if index is not None:
+            index.invalidate(location)
+
+    def _init(self, env, gisdb, location, mapset, loadlibs):
+        """Set the session variables in `env` and write the gisrc file."""
+        keys = ("GIS_LOCK", "GISDBASE", "GISRC")
+        gisrc_dir = None
+        if self.scratch_dir is not None:
+            keys += ("TMPDIR", "TEMP", "TMP", "GRASS_TMPDIR_MAPSET")
+        snapshot = self._open_snapshot = EnvSnapshot(env, keys)
+        try:
+            if self.scratch_dir is not None:
+                gisrc_dir = self.get_tmpdir()
+                for key in ("TMPDIR", "TEMP", "TMP"):
+                    env[key] = gisrc_dir
+                # write the GRASS temporary files in TMPDIR instead of the mapset
+                env["GRASS_TMPDIR_MAPSET"] = "0"
+            env = grass_init(
+                self.gisbase,
+                gisdb,
+                location,
+                mapset,
+                env=env,
+                loadlibs=loadlibs,
+                timings=self.timings,
+                gisrc_dir=gisrc_dir,
+            )
+        except Exception:
+            self._open_snapshot = None
+            snapshot.restore()
+            raise
+        snapshot.record_applied()
+        self._gisrc = env["GISRC"]
+        return env
+
+    def lock_mapset(self, path, mode="exclusive", timeout=None):
+        """Acquire the lock of a mapset, the lock is released when the
+        session is closed."""
+        # lazy import
+        from grass_session.lock import MapsetLock, MapsetLockError
+
+        if mode not in (True, "exclusive", "shared"):
+            raise ValueError("Invalid lock mode: {}".format(mode))
+        lock = MapsetLock(path, shared=mode == "shared")
+        with self.timings.phase("lock"):
+            if not lock.acquire(timeout=timeout):
+                raise MapsetLockError(
+                    "Cannot lock {} within {} seconds".format(path, timeout)
+                )
+        self.lock = lock
+
+    def _release_lock(self):
+        if self.lock is not None:
+            self.lock.release()
+            self.lock = None
 
     def create(self, path, create_opts):
         """Create a new mapset
@@ -471,16 +780,322 @@ class Session(object):
 
         See an example in `Session.open()` method.
         """
-        grass_create(self.grassbin, path, create_opts)
+        self._create(path, create_opts)
+
+    def _create(self, path, create_opts):
+        # lazy import
+        from grass_session.templates import get_templates
+
+        templates = get_templates(self.templates)
+        location = os.path.dirname(os.path.normpath(str(path)))
+        with self.timings.phase("grass_create"):
+            if (
+                templates is not None
+                and create_opts
+                and not os.path.exists(os.path.join(location, "PERMANENT"))
+            ):
+                templates.create(self.grassbin, path, create_opts)
+            else:
+                grass_create(self.grassbin, path, create_opts)
+
+    def _restore_env(self):
+        """Remove the gisrc file and restore the environment as it was before
+        the session."""
+        if self._open_snapshot is not None:
+            snapshot, self._open_snapshot = self._open_snapshot, None
+            # remove the gisrc written by open, GISRC could belong to another
+            # session opened later
+            gisrc, self._gisrc = self._gisrc, None
+            if gisrc and os.path.exists(gisrc):
+                os.remove(gisrc)
+            snapshot.restore()
+        if self._env_snapshot is not None:
+            self._env_snapshot.restore()
+            self._env_snapshot = None
 
     def close(self):
-        """Close a GRASS Session."""
-        if "GISRC" in self.env:
-            self.env.pop("GIS_LOCK")
-            os.remove(self.env.pop("GISRC"))
+        """Close a GRASS Session, the environment and ``sys.path`` are restored
+        exactly as they were before the session. Closing a closed session does
+        nothing."""
+        if self._open_snapshot is None and self._env_snapshot is None:
+            return
+        with self.timings.phase("close"):
+            self._restore_env()
+            if self._tmpdir is not None:
+                shutil.rmtree(self._tmpdir, ignore_errors=True)
+                self._tmpdir = None
+            self._release_lock()
+
+    @property
+    def closed(self):
+        """True if the session is not opened."""
+        return self._open_snapshot is None
+
+    def run_command(self, module, env=None, **kwargs):
+        """Execute a GRASS module with the session environment (or with `env`),
+        raise a RuntimeError if the module fails. The arguments are converted
+        with `make_command`. The cached query outputs are discarded."""
+        if self.memo is not None:
+            self.memo.clear()
+        cmd = make_command(module, **kwargs)
+        timing.count_subprocess()
+        returncode = subprocess.call(cmd, env=self.env if env is None else env)
+        if returncode != 0:
+            raise RuntimeError(
+                "Module {cmd} returned {code}".format(
+                    cmd=" ".join(cmd), code=returncode
+                )
+            )
+        return returncode
+
+    def read_command(self, module, env=None, **kwargs):
+        """Execute a GRASS module with the session environment (or with `env`)
+        and return its standard output as string. With ``memoize=True`` the
+        output of the query modules is cached."""
+        if self.memo is not None:
+            return self.memo.read_command(self._read_command, module, env, **kwargs)
+        return self._read_command(module, env=env, **kwargs)
+
+    def _read_command(self, module, env=None, **kwargs):
+        cmd = make_command(module, **kwargs)
+        timing.count_subprocess()
+        proc = subprocess.Popen(
+            cmd,
+            env=self.env if env is None else env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        out, err = proc.communicate()
+        if proc.returncode != 0:
+            raise RuntimeError(
+                "Module {cmd} returned {code}, GRASS said:\n{err}".format(
+                    cmd=" ".join(cmd), code=proc.returncode, err=err.decode()
+                )
+            )
+        return out.decode()
+
+    def stream_command(
+        self, module, chunk_size=None, encoding="utf-8", env=None, **kwargs
+    ):
+        """Execute a GRASS module with the session environment and yield its
+        standard output incrementally.
+
+        The output is not accumulated in memory: the module is blocked by
+        the operating system pipe while the consumer is not reading, the
+        standard error is spooled to a temporary file and reported if the
+        module fails. If the generator is closed before the end the module
+        is killed.
+
+        Parameters
+        ----------
+        module : string
+            Name of the GRASS module, the other keyword arguments are
+            converted with `make_command`
+        chunk_size : int
+            If given yield the output read in blocks of `chunk_size` bytes
+            (multi-byte characters are never split), otherwise yield the
+            lines of the output
+        encoding : string
+            Encoding of the module output
+        env : dict
+            Environment of the module, by default the session environment
+
+        Examples
+        --------
+        >>> with Session(gisdb=TMPDIR, location="loc") as sess:
+        ...     for line in sess.stream_command("r.stats", input="landuse",
+        ...                                     flags="cn"):
+        ...         value, count = line.split()
+        """
+        # lazy import
+        import codecs
+
+        cmd = make_command(module, **kwargs)
+        decoder = codecs.getincrementaldecoder(encoding)()
+        with tmpfile.TemporaryFile() as stderr:
+            timing.count_subprocess()
+            proc = subprocess.Popen(
+                cmd,
+                env=self.env if env is None else env,
+                stdout=subprocess.PIPE,
+                stderr=stderr,
+            )
+            try:
+                if chunk_size:
+                    chunks = iter(lambda: proc.stdout.read(chunk_size), b"")
+                else:
+                    chunks = iter(proc.stdout.readline, b"")
+                for chunk in chunks:
+                    text = decoder.decode(chunk)
+                    if text:
+                        yield text
+                text = decoder.decode(b"", final=True)
+                if text:
+                    yield text
+                returncode = proc.wait()
+            finally:
+                if proc.poll() is None:
+                    proc.kill()
+                    proc.wait()
+                proc.stdout.close()
+            if returncode != 0:
+                stderr.seek(0)
+                raise RuntimeError(
+                    "Module {cmd} returned {code}, GRASS said:\n{err}".format(
+                        cmd=" ".join(cmd),
+                        code=returncode,
+                        err=stderr.read().decode(encoding, "replace"),
+                    )
+                )
+
+    @contextlib.contextmanager
+    def batch(self, stop_on_error=True):
+        """Record the modules called in the ``with`` block and execute them at
+        the end with a single shell script under the session environment.
+
+        The modules are still separate executables, but the chain is started
+        with one process from Python; the `BatchStep` returned by each call
+        holds the standard output, the standard error and the exit code of
+        the module after the block.
+
+        Parameters
+        ----------
+        stop_on_error : bool
+            Stop at the first failing module and raise a RuntimeError
 
-        self.env = clean_grass_path_env(
-            gisbase=self.gisbase, env=self.env, grassbin=None
+        Examples
+        --------
+        >>> with Session(gisdb=TMPDIR, location="loc") as sess:
+        ...     with sess.batch() as batch:
+        ...         batch.run_command("g.region", raster="elevation")
+        ...         univar = batch.run_command("r.univar", map="elevation",
+        ...                                    flags="g")
+        ...     print(univar.stdout)
+        """
+        # lazy import
+        from grass_session.batch import Batch
+
+        batch = Batch(self, stop_on_error=stop_on_error)
+        yield batch
+        batch.execute()
+        if stop_on_error:
+            batch.check()
+
+    def worker(self, loadlibs=False):
+        """Return a `GrassWorker`: a long-lived Python interpreter started
+        with the session environment, executing the functions received
+        through a pipe.
+
+        Since ``LD_LIBRARY_PATH`` must be defined before an interpreter
+        starts, the worker is the way to use the GRASS C libraries (ctypes,
+        pygrass) of the session and to execute many small GRASS operations
+        without starting a new process for each one.
+
+        Parameters
+        ----------
+        loadlibs : bool
+            Load the GRASS C libraries in the worker when it starts
+
+        Examples
+        --------
+        >>> with Session(gisdb=TMPDIR, location="loc") as sess:
+        ...     with sess.worker(loadlibs=True) as worker:
+        ...         names = worker.call("grass.script.list_strings", "raster")
+        ...         infos = [worker.call("grass.script.raster_info", name)
+        ...                  for name in names]
+        """
+        # lazy import
+        from grass_session.worker import GrassWorker
+
+        timing.count_subprocess()
+        return GrassWorker(self.env, gisbase=self.gisbase, loadlibs=loadlibs)
+
+    def get_tmpdir(self):
+        """Return the temporary directory of the session, created in the
+        scratch directory if given, the directory is removed when the session
+        is closed."""
+        if self._tmpdir is None:
+            tmpdir = None
+            if self.scratch_dir is not None:
+                tmpdir = get_scratch_dir(self.scratch_dir, self.scratch_min_free)
+            self._tmpdir = tmpfile.mkdtemp(prefix="grass-session-", dir=tmpdir)
+        return self._tmpdir
+
+    def mkstemp(self, suffix=""):
+        """Return the path of a new file in the temporary directory of the
+        session."""
+        fd, path = tmpfile.mkstemp(suffix=suffix, dir=self.get_tmpdir())
+        os.close(fd)
+        return path
+
+    def get_region(self):
+        """Return a dictionary with the current region of the session."""
+        # lazy import
+        from grass_session.raster import read_region
+
+        return read_region(self.gisdb, self.location, self.mapset, env=self.env)
+
+    def read_raster(self, name, region=None, null=None, mode="r"):
+        """Return a raster map as ``numpy.memmap``, see
+        `grass_session.raster.read_raster`.
+
+        Examples
+        --------
+        >>> with Session(gisdb=TMPDIR, location="loc") as sess:
+        ...     elev = sess.read_raster("elevation")
+        ...     sess.write_raster(elev * 3.28084, "elevation_ft")
+        """
+        # lazy import
+        from grass_session.raster import read_raster
+
+        return read_raster(self, name, region=region, null=null, mode=mode)
+
+    def write_raster(self, array, name, region=None, null=None, overwrite=False):
+        """Import a 2D array as raster map, see
+        `grass_session.raster.write_raster`."""
+        # lazy import
+        from grass_session.raster import write_raster
+
+        write_raster(
+            self, array, name, region=region, null=null, overwrite=overwrite
+        )
+
+    def iter_tiles(
+        self, raster, tile_rows, tile_cols, overlap=0, prefetch=False, null=None
+    ):
+        """Yield a raster map tile by tile as ``numpy.memmap`` arrays, see
+        `grass_session.raster.iter_tiles`.
+
+        Parameters
+        ----------
+        raster : string
+            Name of the raster map
+        tile_rows, tile_cols : int
+            Number of rows and columns of the tiles
+        overlap : int
+            Number of cells shared with the neighbouring tiles
+        prefetch : bool
+            Export the next tile in a background thread
+
+        Examples
+        --------
+        >>> with Session(gisdb=TMPDIR, location="loc") as sess:
+        ...     total = 0
+        ...     for tile in sess.iter_tiles("elevation", 1024, 1024,
+        ...                                 prefetch=True):
+        ...         total += np.nansum(tile)
+        """
+        # lazy import
+        from grass_session.raster import iter_tiles
+
+        return iter_tiles(
+            self,
+            raster,
+            tile_rows,
+            tile_cols,
+            overlap=overlap,
+            prefetch=prefetch,
+            null=null,
         )
 
     def __enter__(self):
@@ -499,31 +1114,140 @@ class TmpSession(Session):
         self.created_path = None
         super(TmpSession, self).__init__(*args, **kwargs)
 
+    def open(
+        self,
+        gisdb,
+        location,
+        mapset=None,
+        create_opts=None,
+        env=None,
+        loadlibs=False,
+        lock=False,
+        lock_timeout=None,
+        overlay=None,
+    ):
+        """Open or create a temporary GRASS GIS mapset.
+
+        Parameters
+        ----------
+        overlay : string, path-like
+            Path to an existing location used as read-only base, a new
+            location is created in `gisdb` with a private writable mapset
+            (by default ``scratch``) and links to the mapsets of the base
+            location, see `TmpSession.overlay()`
+
+        The other parameters are documented in `Session.open()`.
+
+        Examples
+        --------
+        Work in a scratch mapset placed on tmpfs
+
+        >>> with TmpSession(gisdb="/dev/shm", location="scratch",
+        ...                 overlay="/data/grassdata/europe") as sess:
+        ...     print(parse_command("g.mapsets", flags="l"))
+        """
+        if overlay is not None:
+            mapset = "scratch" if mapset is None else mapset
+            self.overlay(overlay, os.path.join(str(gisdb), str(location)), mapset)
+            create_opts = None
+        return super(TmpSession, self).open(
+            gisdb,
+            location,
+            mapset=mapset,
+            create_opts=create_opts,
+            env=env,
+            loadlibs=loadlibs,
+            lock=lock,
+            lock_timeout=lock_timeout,
+        )
+
+    def overlay(self, base, path, mapset):
+        """Create a temporary location sharing the mapsets of an existing
+        location.
+
+        The mapsets of the `base` location are symbolic links and a new
+        `mapset` is created with the default region of PERMANENT, so the
+        cost of creating and removing the location does not depend on the
+        size of the base location. The base mapsets must be used as
+        read-only, all the new data must be written in the new mapset.
+
+        Parameters
+        ----------
+        base : string, path-like
+            Path to the existing location
+        path : string, path-like
+            Path of the new temporary location
+        mapset : string
+            Name of the new writable mapset
+        """
+        base, path = os.path.abspath(str(base)), str(path)
+        if not os.path.isdir(os.path.join(base, "PERMANENT")):
+            raise RuntimeError("{} is not a GRASS GIS location.".format(base))
+        if mapset == "PERMANENT" or os.path.exists(os.path.join(base, mapset)):
+            raise ValueError(
+                "The mapset {} already exists in {}.".format(mapset, base)
+            )
+        os.mkdir(path)
+        self.created_path = path
+        atexit.register(self.close)
+        for name in os.listdir(base):
+            if os.path.isdir(os.path.join(base, name)):
+                os.symlink(os.path.join(base, name), os.path.join(path, name))
+        create_mapset(os.path.join(path, mapset))
+
     def create(self, path, create_opts):
         """Create a new temporary location/mapset.
         """
         self.created_path = path
-        grass_create(self.grassbin, path, create_opts)
+        self._create(path, create_opts)
         atexit.register(self.close)
 
     def close(self):
-        """Close a GRASS Session."""
-        if "GISRC" in self.env:
-            self.env.pop("GIS_LOCK")
-            os.remove(self.env.pop("GISRC"))
-
-        self.env = clean_grass_path_env(
-            gisbase=self.gisbase, env=self.env, grassbin=None
-        )
+        """Close a GRASS Session and remove the temporary location/mapset."""
+        super(TmpSession, self).close()
         if self.created_path is not None:
             shutil.rmtree(self.created_path)
             self.created_path = None
 
 
-# set path when importing the library
-GRASSBIN = get_grass_bin()
-GISBASE = get_grass_gisbase(grassbin=GRASSBIN)
-set_grass_path_env(GISBASE, env=os.environ, grassbin=GRASSBIN)
+def is_lazy():
+    """Return True if the GRASS installation must be resolved on demand.
+
+    The lazy mode is enabled setting the ``GRASS_SESSION_LAZY`` environmental
+    variable to a true value (``1``, ``true``, ``yes`` or ``on``), in this
+    case importing the library does not execute any process and does not
+    modify ``os.environ``."""
+    lazy = os.environ.get("GRASS_SESSION_LAZY", "")
+    return lazy.strip().lower() in ("1", "true", "yes", "on")
+
+
+_DEFAULTS = {}
+
+
+def _resolve_default(name):
+    """Resolve and memoize the default GRASSBIN/GISBASE values the first time
+    that they are required, ``os.environ`` is not modified."""
+    if name not in _DEFAULTS:
+        grassbin = _DEFAULTS.get("GRASSBIN")
+        if grassbin is None:
+            grassbin = _DEFAULTS["GRASSBIN"] = get_grass_bin()
+        if name == "GISBASE":
+            _DEFAULTS["GISBASE"] = get_grass_gisbase(grassbin=grassbin)
+    return _DEFAULTS[name]
+
+
+def __getattr__(name):
+    # resolve GRASSBIN and GISBASE on demand (only Python >= 3.7)
+    if name in ("GRASSBIN", "GISBASE"):
+        return _resolve_default(name)
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
+# set path when importing the library, unless the lazy mode is enabled
+if not is_lazy():
+    GRASSBIN = _resolve_default("GRASSBIN")
+    GISBASE = _resolve_default("GISBASE")
+    set_grass_path_env(GISBASE, env=os.environ, grassbin=GRASSBIN)
 
 
 if __name__ == "__main__":
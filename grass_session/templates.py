@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Cache of the locations created by the GRASS launcher.
+
+The first time that a location is created with a given ``create_opts`` the
+location is stored in the cache directory, the following locations with the
+same options are cloned from the cached template without executing GRASS.
+"""
+import hashlib
+import os
+import shutil
+import tempfile as tmpfile
+import time
+
+from grass_session import cache
+from grass_session.session import get_grass_gisbase, grass_create
+
+COMPLETE = ".complete"
+TEMPLATE = "location"
+
+
+def _tree_size(path):
+    size = 0
+    for root, dirs, files in os.walk(path):
+        for fname in files:
+            try:
+                size += os.lstat(os.path.join(root, fname)).st_size
+            except OSError:
+                pass
+    return size
+
+
+def _link_tree(src, dst, ignore=(".tmp",)):
+    """Recreate the directories of src in dst and hard link the files,
+    ``shutil.copytree`` accepts a ``copy_function`` only on python 3."""
+    for root, dirs, files in os.walk(src):
+        dirs[:] = [dname for dname in dirs if dname not in ignore]
+        target = os.path.normpath(os.path.join(dst, os.path.relpath(root, src)))
+        os.makedirs(target)
+        shutil.copymode(root, target)
+        for fname in files:
+            if fname not in ignore:
+                os.link(os.path.join(root, fname), os.path.join(target, fname))
+
+
+class LocationTemplates(object):
+    def __init__(self, path=None, max_size=256 * 2 ** 20, link=False):
+        """Cache of location templates.
+
+        Parameters
+        ----------
+        path : string, path-like
+            Directory where the templates are stored, by default the
+            ``locations`` directory in the user cache directory
+        max_size : int
+            Maximum size in bytes of the templates, the least recently used
+            templates are removed first
+        link : bool
+            If True the files of the new locations are hard links to the
+            template files, it is faster but the locations must not modify
+            the PERMANENT files, by default the files are copied
+
+        Examples
+        --------
+        >>> templates = LocationTemplates()
+        >>> for i in range(10):
+        ...     with TmpSession(gisdb=TMPDIR, location="loc",
+        ...                     create_opts="EPSG:3035", templates=templates):
+        ...         print(parse_command("g.proj", flags="g"))
+        """
+        self.path = cache.get_cache_path("locations") if path is None else str(path)
+        self.max_size = max_size
+        self.link = link
+
+    def key(self, grassbin, create_opts):
+        """Return the name of the template for the GRASS installation and the
+        creation options, if the options are a georeferenced file the key
+        changes when the file is modified."""
+        opts = create_opts
+        if os.path.exists(create_opts):
+            st = os.stat(create_opts)
+            opts = "{}|{}|{}".format(
+                os.path.realpath(create_opts), st.st_mtime, st.st_size
+            )
+        key = "{}|{}".format(get_grass_gisbase(grassbin=grassbin), opts)
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def get(self, grassbin, create_opts):
+        """Return the path to the template location, the location is created
+        if it is not available."""
+        tpath = os.path.join(self.path, self.key(grassbin, create_opts))
+        if os.path.exists(os.path.join(tpath, COMPLETE)):
+            os.utime(os.path.join(tpath, COMPLETE), None)
+            return os.path.join(tpath, TEMPLATE)
+
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+        tmpdir = tmpfile.mkdtemp(prefix=".tmp-", dir=self.path)
+        try:
+            grass_create(grassbin, os.path.join(tmpdir, TEMPLATE), create_opts)
+            with open(os.path.join(tmpdir, COMPLETE), "w") as complete:
+                complete.write(create_opts)
+            try:
+                os.rename(tmpdir, tpath)
+            except OSError:
+                # the template has been created by another process
+                if not os.path.exists(os.path.join(tpath, COMPLETE)):
+                    raise
+        finally:
+            if os.path.exists(tmpdir):
+                shutil.rmtree(tmpdir)
+        self.evict(keep=tpath)
+        return os.path.join(tpath, TEMPLATE)
+
+    def create(self, grassbin, path, create_opts):
+        """Create a new location cloning the template."""
+        template = self.get(grassbin, create_opts)
+        if self.link and hasattr(os, "link"):
+            try:
+                _link_tree(template, str(path))
+                return
+            except OSError:
+                # e.g. different file systems
+                if os.path.exists(str(path)):
+                    shutil.rmtree(str(path))
+        shutil.copytree(template, str(path), ignore=shutil.ignore_patterns(".tmp"))
+
+    def templates(self):
+        """Return a list of tuples with: the last access time, the size and
+        the path of the cached templates."""
+        if not os.path.isdir(self.path):
+            return []
+        templates = []
+        for name in os.listdir(self.path):
+            tpath = os.path.join(self.path, name)
+            complete = os.path.join(tpath, COMPLETE)
+            if os.path.exists(complete):
+                templates.append(
+                    (os.stat(complete).st_mtime, _tree_size(tpath), tpath)
+                )
+        return sorted(templates)
+
+    def evict(self, keep=None):
+        """Remove the least recently used templates until the cache size is
+        smaller than the maximum size."""
+        templates = self.templates()
+        total = sum(size for _, size, _ in templates)
+        for _, size, tpath in templates:
+            if total <= self.max_size:
+                break
+            if tpath == keep:
+                continue
+            # rename before removing to not clone a partially removed template
+            trash = tpath + ".{}.removed".format(time.time())
+            try:
+                os.rename(tpath, trash)
+            except OSError:
+                continue
+            shutil.rmtree(trash, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        """Remove all the templates."""
+        if os.path.isdir(self.path):
+            shutil.rmtree(self.path)
+
+
+def get_templates(templates=None):
+    """Return the `LocationTemplates` instance to be used by a session.
+
+    `templates` can be an instance, True to use the default cache directory,
+    or None to use the default cache directory only if the ``GRASS_SESSION_TEMPLATES``
+    environmental variable is set to a true value."""
+    if isinstance(templates, LocationTemplates):
+        return templates
+    if templates is None:
+        enabled = os.environ.get("GRASS_SESSION_TEMPLATES", "")
+        templates = enabled.strip().lower() in ("1", "true", "yes", "on")
+    return LocationTemplates() if templates else None
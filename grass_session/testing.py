@@ -0,0 +1,337 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Fake GRASS GIS installation to test and benchmark the library without GRASS.
+
+`make_fake_grass` creates a launcher answering to ``--config path`` and to
+``-c [opts] -e path`` and a GISBASE with the ``bin``, ``lib``, ``scripts``
+and ``etc/python`` directories; ``bin`` contains a few fake modules
+(``g.gisenv``, ``g.region``, ``g.proj``, ``r.info``, ``r.out.bin`` and
+``r.in.bin``) reading and writing the mapset files.
+
+The module is also a pytest plugin providing the ``fake_grass`` fixture and
+the ``fake_session`` factory of opened sessions::
+
+    # conftest.py
+    pytest_plugins = ["grass_session.testing"]
+
+    def test_session(fake_grass, tmp_path):
+        with TmpSession(gisdb=str(tmp_path), location="loc",
+                        create_opts="EPSG:3035", isolated=True) as sess:
+            assert sess.read_command("g.gisenv", get="MAPSET") == "PERMANENT\\n"
+"""
+import os
+import stat
+import sys
+
+from grass_session import session
+
+LAUNCHER = r'''
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.realpath(__file__))
+GISBASE = os.path.join(ROOT, "gisbase")
+WIND = """proj:       {proj}
+zone:       0
+north:      10
+south:      0
+east:       10
+west:       0
+cols:       10
+rows:       10
+e-w resol:  1
+n-s resol:  1
+top:        1
+bottom:     0
+cols3:      10
+rows3:      10
+depths:     1
+e-w resol3: 1
+n-s resol3: 1
+t-b resol:  1
+"""
+VAR = (
+    "DB_DRIVER: sqlite\n"
+    "DB_DATABASE: $GISDBASE/$LOCATION_NAME/$MAPSET/sqlite/sqlite.db\n"
+)
+
+
+def write(path, content):
+    with open(path, "w") as fl:
+        fl.write(content)
+
+
+def create_mapset(path, wind):
+    os.makedirs(os.path.join(path, "sqlite"))
+    write(os.path.join(path, "WIND"), wind)
+    write(os.path.join(path, "VAR"), VAR)
+
+
+def create_location(path, opts):
+    permanent = os.path.join(path, "PERMANENT")
+    proj = 99 if opts.upper().startswith("EPSG:") else 0
+    wind = WIND.format(proj=proj)
+    create_mapset(permanent, wind)
+    write(os.path.join(permanent, "DEFAULT_WIND"), wind)
+    write(os.path.join(permanent, "MYNAME"), "fake location\n")
+    if proj:
+        code = opts.split(":")[1]
+        write(os.path.join(permanent, "PROJ_EPSG"), "epsg: {}\n".format(code))
+        write(
+            os.path.join(permanent, "PROJ_INFO"),
+            "name: EPSG {code}\ninit: EPSG:{code}\n".format(code=code),
+        )
+        write(
+            os.path.join(permanent, "PROJ_UNITS"),
+            "unit: meter\nunits: meters\nmeters: 1\n",
+        )
+
+
+def main(args):
+    with open(os.path.join(ROOT, "calls.log"), "a") as log:
+        log.write(" ".join(args) + "\n")
+    if args == ["--config", "path"]:
+        print(GISBASE)
+        return 0
+    if len(args) >= 3 and args[0] == "-c" and args[-2] == "-e":
+        path, opts = args[-1], " ".join(args[1:-2])
+        if os.path.exists(path):
+            sys.stderr.write("ERROR: {} already exists\n".format(path))
+            return 1
+        permanent = os.path.join(os.path.dirname(path), "PERMANENT")
+        if opts:
+            create_location(path, opts)
+        elif os.path.isdir(permanent):
+            with open(os.path.join(permanent, "DEFAULT_WIND")) as wind:
+                create_mapset(path, wind.read())
+        else:
+            sys.stderr.write("ERROR: missing location\n")
+            return 1
+        return 0
+    sys.stderr.write("ERROR: unsupported arguments: {}\n".format(args))
+    return 1
+
+
+sys.exit(main(sys.argv[1:]))
+'''
+
+# code shared by the fake modules to read the gisrc and the mapset files
+MODULE = r'''
+import os
+import sys
+
+with open(os.environ["GISRC"]) as rc:
+    GISENV = dict(line.split(": ", 1) for line in rc.read().splitlines())
+MAPSET = os.path.join(
+    GISENV["GISDBASE"], GISENV["LOCATION_NAME"], GISENV["MAPSET"]
+)
+PERMANENT = os.path.join(GISENV["GISDBASE"], GISENV["LOCATION_NAME"], "PERMANENT")
+FLAGS = "".join(arg[1:] for arg in sys.argv[1:] if arg.startswith("-"))
+OPTIONS = dict(arg.split("=", 1) for arg in sys.argv[1:] if "=" in arg)
+
+
+def read_keys(path):
+    with open(path) as fl:
+        return [
+            [item.strip() for item in line.split(":", 1)]
+            for line in fl.read().splitlines()
+            if ":" in line
+        ]
+
+
+def read_region(path=None):
+    if path is None and os.environ.get("GRASS_REGION"):
+        lines = os.environ["GRASS_REGION"].split(";")
+        keys = [[item.strip() for item in line.split(":", 1)] for line in lines]
+    else:
+        keys = read_keys(path or os.path.join(MAPSET, "WIND"))
+    region = dict(keys)
+    for key in ("north", "south", "east", "west"):
+        region[key] = float(region[key])
+    for key in ("rows", "cols"):
+        region[key] = int(region[key])
+    return region
+'''
+
+# raster maps are stored as a header in ``cellhd`` and as doubles in ``fake_cell``
+RASTER = r'''
+from array import array
+
+
+def raster_paths(name):
+    return [os.path.join(MAPSET, dname, name) for dname in ("cellhd", "fake_cell")]
+'''
+
+MODULES = {
+    "g.gisenv": r'''
+if "get" in OPTIONS:
+    print(GISENV[OPTIONS["get"]])
+else:
+    for key, value in sorted(GISENV.items()):
+        print("{}={}".format(key, value))
+''',
+    "g.region": r'''
+KEYS = dict(north="n", south="s", east="e", west="w", rows="rows", cols="cols")
+KEYS["n-s resol"], KEYS["e-w resol"] = "nsres", "ewres"
+region = dict(read_keys(os.path.join(MAPSET, "WIND")))
+for key in ("north", "south", "west", "east", "n-s resol", "e-w resol", "rows",
+            "cols"):
+    print("{}={}".format(KEYS[key], region[key]))
+''',
+    "r.info": RASTER
+    + r'''
+header, cells = raster_paths(OPTIONS["map"])
+if not os.path.exists(header):
+    sys.stderr.write("ERROR: Raster map <{}> not found\n".format(OPTIONS["map"]))
+    sys.exit(1)
+for key, value in read_keys(header):
+    print("{}={}".format(key, value))
+''',
+    "r.out.bin": RASTER
+    + r'''
+header, cells = raster_paths(OPTIONS["input"])
+source, region = read_region(header), read_region()
+data = array("d")
+with open(cells, "rb") as fl:
+    data.frombytes(fl.read())
+typecode = "i" if "i" in FLAGS else ("f" if OPTIONS["bytes"] == "4" else "d")
+null = float(OPTIONS["null"]) if typecode != "i" else int(OPTIONS["null"])
+nsres = (source["north"] - source["south"]) / source["rows"]
+ewres = (source["east"] - source["west"]) / source["cols"]
+out = array(typecode)
+for row in range(region["rows"]):
+    y = region["north"] - (row + 0.5) * (
+        (region["north"] - region["south"]) / region["rows"]
+    )
+    srow = int((source["north"] - y) // nsres)
+    for col in range(region["cols"]):
+        x = region["west"] + (col + 0.5) * (
+            (region["east"] - region["west"]) / region["cols"]
+        )
+        scol = int((x - source["west"]) // ewres)
+        value = null
+        if 0 <= srow < source["rows"] and 0 <= scol < source["cols"]:
+            cell = data[srow * source["cols"] + scol]
+            if cell == cell:
+                value = int(cell) if typecode == "i" else cell
+        out.append(value)
+with open(OPTIONS["output"], "wb") as fl:
+    fl.write(out.tobytes())
+''',
+    "r.in.bin": RASTER
+    + r'''
+header, cells = raster_paths(OPTIONS["output"])
+if os.path.exists(header) and "-o" not in FLAGS:
+    sys.stderr.write("ERROR: <{}> already exists\n".format(OPTIONS["output"]))
+    sys.exit(1)
+typecode, datatype = "i", "CELL"
+if "f" in FLAGS:
+    typecode, datatype = "f", "FCELL"
+elif "d" in FLAGS:
+    typecode, datatype = "d", "DCELL"
+data = array(typecode)
+with open(OPTIONS["input"], "rb") as fl:
+    data.frombytes(fl.read())
+null = float(OPTIONS["anull"]) if "anull" in OPTIONS else None
+for path in (header, cells):
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+with open(header, "w") as fl:
+    for key in ("north", "south", "east", "west", "rows", "cols"):
+        fl.write("{}: {}\n".format(key, OPTIONS[key]))
+    fl.write("datatype: {}\n".format(datatype))
+with open(cells, "wb") as fl:
+    fl.write(
+        array(
+            "d", [float("nan") if value == null else value for value in data]
+        ).tobytes()
+    )
+''',
+    "g.proj": r'''
+path = os.path.join(PERMANENT, "PROJ_INFO")
+if not os.path.exists(path):
+    print("name=xy_location_unprojected")
+else:
+    for key, value in read_keys(path):
+        print("{}={}".format(key, value))
+''',
+}
+
+
+class FakeGrass(object):
+    def __init__(self, path):
+        """Create a fake GRASS GIS installation in `path`."""
+        self.path = str(path)
+        self.grassbin = os.path.join(self.path, "grass")
+        self.gisbase = os.path.join(self.path, "gisbase")
+        self.log = os.path.join(self.path, "calls.log")
+        for dname in ("bin", "lib", "scripts", os.path.join("etc", "python")):
+            os.makedirs(os.path.join(self.gisbase, dname))
+        self.add_script(self.grassbin, LAUNCHER)
+        for name, code in MODULES.items():
+            self.add_module(name, code)
+
+    @staticmethod
+    def add_script(path, code):
+        """Write an executable python script."""
+        with open(path, "w") as script:
+            script.write("#!{}\n".format(sys.executable))
+            script.write(code)
+        os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+
+    def add_module(self, name, code):
+        """Add a fake module in the GISBASE ``bin`` directory, the code can use
+        the ``GISENV``, ``MAPSET``, ``PERMANENT``, ``FLAGS`` and ``OPTIONS``
+        variables and the ``read_keys`` and ``read_region`` functions."""
+        self.add_script(os.path.join(self.gisbase, "bin", name), MODULE + code)
+
+    def calls(self):
+        """Return the list of the arguments used to execute the launcher."""
+        if not os.path.exists(self.log):
+            return []
+        with open(self.log) as log:
+            return log.read().splitlines()
+
+
+def make_fake_grass(path):
+    """Create a fake GRASS GIS installation and return a `FakeGrass`."""
+    return FakeGrass(path)
+
+
+try:
+    import pytest
+except ImportError:  # pragma: no cover
+    pytest = None
+
+if pytest is not None:
+
+    @pytest.fixture(scope="function")
+    def fake_grass(tmp_path, monkeypatch):
+        """Point ``GRASSBIN`` to a fake GRASS GIS installation and return the
+        `FakeGrass` instance."""
+        fake = make_fake_grass(tmp_path / "fakegrass")
+        monkeypatch.setenv("GRASSBIN", fake.grassbin)
+        session.clear_grass_gisbase_cache()
+        yield fake
+        session.clear_grass_gisbase_cache()
+
+    @pytest.fixture(scope="function")
+    def fake_session(tmp_path, fake_grass):
+        """Return a function opening an isolated `Session` of the fake GRASS
+        installation, by default on a new XY location ``loc`` in
+        `tmp_path`; the sessions are closed at the end of the test."""
+        sessions = []
+
+        def open_session(**kwargs):
+            kwargs.setdefault("gisdb", str(tmp_path))
+            kwargs.setdefault("location", "loc")
+            kwargs.setdefault("create_opts", "XY")
+            kwargs.setdefault("isolated", True)
+            sess = session.Session(**kwargs).__enter__()
+            sessions.append(sess)
+            return sess
+
+        yield open_session
+        for sess in reversed(sessions):
+            sess.close()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Opt-in instrumentation of the session lifecycle.
+
+Each phase (e.g. ``get_grass_gisbase``, ``grass_create``, ``close``) records
+the number of calls, the wall time and the number of processes executed by
+the library. The measures are logged at the DEBUG level by the
+``grass_session.timing`` logger and passed to the registered hooks, to be
+exported to a metrics system.
+"""
+import contextlib
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_HOOKS = []
+_LOCK = threading.Lock()
+# number of processes executed by the library, the counter is global so the
+# phases executed in parallel threads count the processes of all threads
+_SUBPROCESSES = [0]
+
+
+def is_enabled():
+    """Return True if the ``GRASS_SESSION_TIMINGS`` variable is set to a true
+    value."""
+    enabled = os.environ.get("GRASS_SESSION_TIMINGS", "")
+    return enabled.strip().lower() in ("1", "true", "yes", "on")
+
+
+def count_subprocess():
+    """Increment the counter of the executed processes."""
+    with _LOCK:
+        _SUBPROCESSES[0] += 1
+
+
+def add_timing_hook(hook):
+    """Register a function called at the end of each phase as
+    ``hook(phase, seconds, subprocesses)``."""
+    _HOOKS.append(hook)
+
+
+def remove_timing_hook(hook):
+    """Remove a function registered with `add_timing_hook`."""
+    _HOOKS.remove(hook)
+
+
+class Timings(dict):
+    def __init__(self, enabled=True):
+        """Dictionary with the measures of each phase, for each phase it
+        contains a dictionary with ``calls``, ``seconds`` and
+        ``subprocesses``.
+
+        >>> timings = Timings()
+        >>> with timings.phase("sleep"):
+        ...     time.sleep(0.1)
+        >>> timings["sleep"]["calls"]
+        1
+        """
+        super(Timings, self).__init__()
+        self.enabled = enabled
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Measure the code executed in the context."""
+        if not self.enabled:
+            yield
+            return
+        start, nproc = time.time(), _SUBPROCESSES[0]
+        try:
+            yield
+        finally:
+            seconds = time.time() - start
+            subprocesses = _SUBPROCESSES[0] - nproc
+            stats = self.setdefault(
+                name, dict(calls=0, seconds=0.0, subprocesses=0)
+            )
+            stats["calls"] += 1
+            stats["seconds"] += seconds
+            stats["subprocesses"] += subprocesses
+            logger.debug(
+                "%s: %.6f s, %d subprocesses",
+                name,
+                seconds,
+                subprocesses,
+                extra=dict(phase=name, seconds=seconds, subprocesses=subprocesses),
+            )
+            for hook in list(_HOOKS):
+                hook(name, seconds, subprocesses)
+
+
+def phase(timings, name):
+    """Return a context to measure a phase, `timings` can be None."""
+    if timings is None:
+        return Timings(enabled=False).phase(name)
+    return timings.phase(name)
@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Long-lived Python interpreter executing GRASS GIS functions for a session.
+
+The worker is started with the environment of the session, so the GRASS
+libraries are found through ``LD_LIBRARY_PATH`` and the ``grass`` Python
+package through ``PYTHONPATH``, and it receives the calls through its
+standard input. The requests and the responses are pickled and prefixed with
+their length; the standard output of the worker is redirected to its standard
+error, so the functions printing on stdout do not break the protocol.
+"""
+import importlib
+import os
+import pickle
+import struct
+import subprocess
+import sys
+import threading
+import time
+import traceback
+
+HEADER = struct.Struct(">Q")
+
+# code executed by the child interpreter
+BOOTSTRAP = (
+    "import sys; sys.path.append({path!r}); "
+    "from grass_session.worker import serve; serve({gisbase!r}, {loadlibs!r})"
+)
+
+
+class WorkerError(RuntimeError):
+    """Error raised by a function executed in the worker, the original
+    exception (if it can be pickled) is available as ``exception`` and the
+    formatted traceback of the worker as ``remote_traceback``."""
+
+    def __init__(self, message, exception=None, remote_traceback=""):
+        super(WorkerError, self).__init__(message)
+        self.exception = exception
+        self.remote_traceback = remote_traceback
+
+
+def _read_exactly(fd, size):
+    chunks = []
+    while size:
+        chunk = os.read(fd, size)
+        if not chunk:
+            raise EOFError("The worker pipe has been closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def dumps(obj):
+    return pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def send(fd, obj, data=None):
+    """Write a pickled object prefixed by its length, `data` can be the
+    object already pickled."""
+    data = dumps(obj) if data is None else data
+    data = HEADER.pack(len(data)) + data
+    while data:
+        data = data[os.write(fd, data):]
+
+
+def receive(fd):
+    """Read an object written by `send`."""
+    (size,) = HEADER.unpack(_read_exactly(fd, HEADER.size))
+    return pickle.loads(_read_exactly(fd, size))
+
+
+def resolve(target):
+    """Return the object of a dotted path (e.g. ``grass.script.region``),
+    importing the longest module prefix."""
+    parts = target.split(".")
+    for index in range(len(parts), 0, -1):
+        try:
+            obj = importlib.import_module(".".join(parts[:index]))
+        except ImportError:
+            continue
+        for attr in parts[index:]:
+            obj = getattr(obj, attr)
+        return obj
+    raise ImportError("Cannot import {}".format(target))
+
+
+def execute(request, cache):
+    """Execute a ``(target, args, kwargs)`` request and return the pickled
+    response, the functions are resolved once and stored in `cache`."""
+    target, args, kwargs = request
+    try:
+        func = cache.get(target)
+        if func is None:
+            func = cache[target] = resolve(target)
+        # pickle the result here to report the pickling errors
+        return dumps(("ok", func(*args, **kwargs)))
+    except BaseException as exc:
+        tback = traceback.format_exc()
+        try:
+            return dumps(("error", target, exc, tback))
+        except Exception:
+            return dumps(("error", target, None, tback))
+
+
+def serve(gisbase=None, loadlibs=False, infd=0, outfd=None):
+    """Execute the requests received from the parent process until the pipe
+    is closed or a ``None`` request is received."""
+    if outfd is None:
+        # keep the original stdout for the protocol and send the output of
+        # the functions to stderr
+        sys.stdout.flush()
+        outfd = os.dup(1)
+        os.dup2(2, 1)
+    if loadlibs:
+        from grass_session.libs import load_libs
+
+        load_libs(gisbase)
+    cache = {}
+    while True:
+        try:
+            request = receive(infd)
+        except EOFError:
+            break
+        if request is None:
+            break
+        data = execute(request, cache)
+        sys.stdout.flush()
+        sys.stderr.flush()
+        send(outfd, None, data=data)
+
+
+class GrassWorker(object):
+    def __init__(self, env, gisbase=None, loadlibs=False, python=None):
+        """Start a Python interpreter with the environment of a session.
+
+        Parameters
+        ----------
+        env : dict
+            Environment of the session
+        gisbase : path
+            Path to the GRASS installation, used to load the libraries
+        loadlibs : bool
+            Load the GRASS C libraries in the worker when it starts
+        python : path
+            Python interpreter, by default the current one
+
+        Examples
+        --------
+        >>> with Session(gisdb=TMPDIR, location="loc") as sess:
+        ...     with sess.worker() as worker:
+        ...         for name in names:
+        ...             info = worker.call("grass.script.raster_info", name)
+        """
+        bootstrap = BOOTSTRAP.format(
+            path=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            gisbase=gisbase,
+            loadlibs=loadlibs,
+        )
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.process = subprocess.Popen(
+            [python or sys.executable, "-c", bootstrap],
+            env=dict(env),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+
+    @property
+    def closed(self):
+        return self.process.poll() is not None
+
+    def call(self, target, *args, **kwargs):
+        """Execute the function of the dotted path `target` in the worker
+        and return its result, the arguments and the result must be
+        pickleable. Raise a WorkerError if the function fails."""
+        with self._lock:
+            if self.closed:
+                raise RuntimeError("The worker is not running")
+            try:
+                send(self.process.stdin.fileno(), (target, args, kwargs))
+                response = receive(self.process.stdout.fileno())
+            except (EOFError, OSError):
+                self.process.wait()
+                raise RuntimeError(
+                    "The worker exited with code {}".format(self.process.returncode)
+                )
+            self.calls += 1
+        if response[0] == "ok":
+            return response[1]
+        _, target, exc, tback = response
+        raise WorkerError(
+            "{} failed in the worker:\n{}".format(target, tback),
+            exception=exc,
+            remote_traceback=tback,
+        )
+
+    def close(self, timeout=5):
+        """Stop the worker, kill it if it does not exit within `timeout`
+        seconds."""
+        if self.process.stdin.closed:
+            return
+        with self._lock:
+            try:
+                if not self.closed:
+                    send(self.process.stdin.fileno(), None)
+            except OSError:
+                pass
+            self.process.stdin.close()
+            # Popen.wait(timeout=...) is not available on python 2
+            deadline = time.time() + timeout
+            while self.process.poll() is None and time.time() < deadline:
+                time.sleep(0.01)
+            if self.process.poll() is None:
+                self.process.kill()
+                self.process.wait()
+            self.process.stdout.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __del__(self):
+        process = getattr(self, "process", None)
+        if process is not None and process.poll() is None:
+            process.kill()
+            process.wait()
@@ -7,6 +7,8 @@ import sys
 from setuptools import find_packages, setup
 
 os.chdir(os.path.dirname(sys.argv[0]) or ".")
+# do not look for a GRASS GIS installation just to read the version
+os.environ.setdefault("GRASS_SESSION_LAZY", "1")
 
 import grass_session  # isort:skip
 
@@ -27,4 +29,9 @@ setup(
         "License :: OSI Approved :: GNU General Public License v3 or later (GPLv3+)",
     ],
     packages=find_packages(),
+    extras_require={
+        # numpy is needed only to read and write rasters as arrays
+        "raster": ["numpy"],
+        "test": ["pytest>=2.7", "numpy"],
+    },
 )
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import os
+import sys
+
+import pytest
+
+pytestmark = pytest.mark.skipif(
+    sys.version_info < (3, 7), reason="requires python3.7 or higher"
+)
+
+
+def test__AsyncSession(tmp_path, fake_grass, monkeypatch):
+    from grass_session import AsyncSession
+    from grass_session.aio import grass_create
+
+    semaphore_limit = 4
+    syspath = list(sys.path)
+    # number of running processes and maximum number of concurrent processes
+    running = [0, 0]
+    create_subprocess_exec = asyncio.create_subprocess_exec
+
+    async def counted_exec(*args, **kwargs):
+        proc = await create_subprocess_exec(*args, **kwargs)
+        running[0] += 1
+        running[1] = max(running)
+        communicate = proc.communicate
+
+        async def counted_communicate(*args, **kwargs):
+            try:
+                return await communicate(*args, **kwargs)
+            finally:
+                running[0] -= 1
+
+        proc.communicate = counted_communicate
+        return proc
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", counted_exec)
+
+    async def mapset_of(name, semaphore):
+        async with AsyncSession(
+            gisdb=str(tmp_path),
+            location="loc",
+            mapset=name,
+            create_opts="",
+            semaphore=semaphore,
+        ) as sess:
+            assert sess.env is not os.environ
+            return (await sess.read_command("g.gisenv", get="MAPSET")).strip()
+
+    async def main():
+        semaphore = asyncio.Semaphore(semaphore_limit)
+        await grass_create(fake_grass.grassbin, tmp_path / "loc", "EPSG:3035")
+        names = ["m{}".format(i) for i in range(20)]
+        return names, await asyncio.gather(*[mapset_of(n, semaphore) for n in names])
+
+    names, mapsets = asyncio.run(main())
+    assert mapsets == names
+    assert 1 < running[1] <= semaphore_limit
+    assert sys.path == syspath
+    # location creation and discovery, the mapsets are created natively
+    assert fake_grass.calls() == [
+        "-c EPSG:3035 -e {}".format(tmp_path / "loc"),
+        "--config path",
+    ]
+
+
+def test__AsyncSession__errors(tmp_path, fake_grass):
+    from grass_session.aio import AsyncSession
+
+    async def main():
+        sess = AsyncSession(gisdb=str(tmp_path), location="loc", create_opts="XY")
+        async with sess:
+            with pytest.raises(RuntimeError):
+                await sess.read_command("g.gisenv", get="UNKNOWN")
+        with pytest.raises(RuntimeError):
+            await AsyncSession(
+                gisdb=str(tmp_path), location="loc", create_opts="XY"
+            ).open()
+
+    syspath = list(sys.path)
+    asyncio.run(main())
+    assert sys.path == syspath
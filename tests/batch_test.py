@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+R_FAIL = r"""
+sys.stderr.write("ERROR: {}\n".format(OPTIONS["message"]))
+sys.exit(int(OPTIONS.get("code", 1)))
+"""
+
+
+@pytest.fixture(scope="function")
+def sess(fake_grass, fake_session):
+    fake_grass.add_module("r.fail", R_FAIL)
+    return fake_session()
+
+
+def test__Session__batch(sess):
+    with sess.batch() as batch:
+        steps = [batch.run_command("g.gisenv", get="MAPSET") for _ in range(20)]
+        region = batch.run_command("g.region", flags="g")
+        assert not region.executed
+    assert all(step.returncode == 0 for step in steps)
+    assert all(step.stdout == "PERMANENT\n" for step in steps)
+    assert "rows=10" in region.stdout.split()
+
+
+def test__Session__batch__errors(sess):
+    with pytest.raises(RuntimeError, match="ERROR: no map 'x'"):
+        with sess.batch() as batch:
+            first = batch.run_command("g.gisenv", get="MAPSET")
+            failed = batch.run_command("r.fail", message="no map 'x'", code=3)
+            skipped = batch.run_command("g.gisenv")
+    assert first.returncode == 0
+    assert failed.returncode == 3
+    assert not skipped.executed
+
+    with sess.batch(stop_on_error=False) as batch:
+        failed = batch.run_command("r.fail", message="no map")
+        last = batch.run_command("g.gisenv", get="MAPSET")
+    assert failed.returncode == 1
+    assert failed.stderr == "ERROR: no map\n"
+    assert last.stdout == "PERMANENT\n"
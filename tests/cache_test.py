@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+import os
+
+from grass_session import cache, get_grass_gisbase, session
+
+
+def test__get_grass_gisbase__cache(fake_grass, cache_dir):
+    grassbin = fake_grass.grassbin
+    for _ in range(5):
+        assert get_grass_gisbase(grassbin) == fake_grass.gisbase
+    assert len(fake_grass.calls()) == 1
+    assert os.path.exists(str(cache_dir / session.DISCOVERY_CACHE))
+
+    # a new process reads the value from the disk
+    session.clear_grass_gisbase_cache()
+    assert get_grass_gisbase(grassbin) == fake_grass.gisbase
+    assert len(fake_grass.calls()) == 1
+
+    # the cache is invalidated when the launcher changes
+    with open(grassbin, "a") as launcher:
+        launcher.write("# a new version\n")
+    assert get_grass_gisbase(grassbin) == fake_grass.gisbase
+    assert len(fake_grass.calls()) == 2
+    assert len(cache.read_json(session.DISCOVERY_CACHE)) == 1
+
+
+def test__get_grass_gisbase__nocache(fake_grass, monkeypatch, cache_dir):
+    monkeypatch.setenv("GRASS_SESSION_NO_CACHE", "1")
+    assert get_grass_gisbase(fake_grass.grassbin) == fake_grass.gisbase
+    assert get_grass_gisbase(fake_grass.grassbin) == fake_grass.gisbase
+    assert len(fake_grass.calls()) == 1
+    assert not os.path.exists(str(cache_dir / session.DISCOVERY_CACHE))
+
+    session.clear_grass_gisbase_cache()
+    assert get_grass_gisbase(fake_grass.grassbin) == fake_grass.gisbase
+    assert len(fake_grass.calls()) == 2
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+
+# do not resolve GRASS GIS while collecting the tests
+os.environ.setdefault("GRASS_SESSION_LAZY", "1")
+
+pytest_plugins = ["grass_session.testing"]
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Use a private cache directory and clean the in-process caches."""
+    from grass_session import session
+
+    path = tmp_path / "cache"
+    monkeypatch.setenv("GRASS_SESSION_CACHE_DIR", str(path))
+    session.clear_grass_gisbase_cache()
+    yield path
+    session.clear_grass_gisbase_cache()
+
+
+@pytest.fixture(scope="function")
+def sess(fake_session):
+    """An opened isolated session on a new XY location."""
+    return fake_session()
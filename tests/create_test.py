@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+from grass_session import create_mapset, grass_create
+
+WIND = "proj: 99\nzone: 0\nnorth: 10\nsouth: 0\neast: 10\nwest: 0\n"
+
+
+@pytest.fixture(scope="function")
+def location(tmp_path):
+    permanent = tmp_path / "loc" / "PERMANENT"
+    permanent.mkdir(parents=True)
+    (permanent / "DEFAULT_WIND").write_text(WIND)
+    return tmp_path / "loc"
+
+
+def test__create_mapset(location):
+    create_mapset(location / "user")
+    assert sorted(os.listdir(str(location / "user"))) == ["VAR", "WIND", "sqlite"]
+    assert (location / "user" / "WIND").read_text() == WIND
+    assert (location / "user" / "VAR").read_text().startswith("DB_DRIVER: sqlite")
+
+    # the VAR file of PERMANENT is used if available
+    (location / "PERMANENT" / "VAR").write_text("DB_DRIVER: pg\n")
+    create_mapset(str(location / "other"))
+    assert (location / "other" / "VAR").read_text() == "DB_DRIVER: pg\n"
+
+    with pytest.raises(OSError):
+        create_mapset(location / "user")
+    with pytest.raises(RuntimeError):
+        create_mapset(location.parent / "missing" / "user")
+
+
+def test__grass_create__native(location, fake_grass):
+    grass_create(fake_grass.grassbin, location / "user", "")
+    assert os.path.isfile(str(location / "user" / "WIND"))
+    assert fake_grass.calls() == []
+
+    grass_create(fake_grass.grassbin, location / "launcher", "", native=False)
+    assert fake_grass.calls() == ["-c -e {}".format(location / "launcher")]
+
+    # new locations are always created by the launcher
+    grass_create(fake_grass.grassbin, location.parent / "new", "EPSG:3035")
+    assert len(fake_grass.calls()) == 2
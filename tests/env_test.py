@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import time
+
+from grass_session import Session, grass_create
+from grass_session.env import EnvDiff
+
+
+def test__EnvDiff():
+    env = {"PATH": "/usr/bin::/bin", "LANG": "C"}
+    diff = EnvDiff(
+        variables={"LANG": "en_US.UTF-8", "GISBASE": "/grass"},
+        paths={"PATH": ["/grass/bin", "/bin", "/grass/bin"], "PYTHONPATH": ["/py"]},
+    )
+    before = dict(env)
+    snapshot = diff.apply(env, syspath=False)
+    assert env["PATH"] == os.pathsep.join(["/usr/bin::/bin", "/grass/bin"])
+    assert env["PYTHONPATH"] == "/py"
+    assert env["GISBASE"] == "/grass"
+    # applying again does not duplicate the entries
+    diff.apply(env, syspath=False).restore()
+    assert env["PATH"] == os.pathsep.join(["/usr/bin::/bin", "/grass/bin"])
+    snapshot.restore()
+    assert env == before
+
+    # a path-list modified in the meantime keeps the other changes
+    snapshot = diff.apply(env, syspath=False)
+    env["PATH"] = "/opt/bin" + os.pathsep + env["PATH"]
+    snapshot.restore()
+    assert env["PATH"] == os.pathsep.join(["/opt/bin", "/usr/bin", "/bin"])
+
+
+def test__EnvDiff__out_of_order():
+    env = {"PATH": "/bin"}
+    before = dict(env)
+    first = EnvDiff(variables={"GISRC": "/a"}, paths={"PATH": ["/grass/bin"]})
+    second = EnvDiff(variables={"GISRC": "/b"}, paths={"PATH": ["/opt/bin"]})
+    first_snapshot = first.apply(env, syspath=False)
+    second_snapshot = second.apply(env, syspath=False)
+    first_snapshot.restore()
+    # the changes of the second snapshot are kept
+    assert env == {
+        "PATH": os.pathsep.join(["/bin", "/grass/bin", "/opt/bin"]),
+        "GISRC": "/b",
+    }
+    second_snapshot.restore()
+    assert env == before
+
+
+def test__EnvDiff__syspath():
+    syspath = list(sys.path)
+    diff = EnvDiff(syspath=["/grass/etc/python", syspath[0]])
+    first = diff.apply({})
+    second = diff.apply({})
+    assert sys.path == ["/grass/etc/python"] + syspath
+    first.restore()
+    # still used by the second snapshot
+    assert sys.path[0] == "/grass/etc/python"
+    second.restore()
+    assert sys.path == syspath
+
+
+def test__Session__restore_env(tmp_path, fake_grass, monkeypatch):
+    grass_create(fake_grass.grassbin, tmp_path / "loc", "XY")
+    monkeypatch.setenv("GRASS_ADDON_PATH", "/addons/a" + os.pathsep + "/addons/b")
+    monkeypatch.delenv("GISRC", raising=False)
+    environ, syspath = dict(os.environ), list(sys.path)
+
+    def cycles(number):
+        start = time.time()
+        for _ in range(number):
+            with Session(gisdb=str(tmp_path), location="loc"):
+                pass
+        return time.time() - start
+
+    first = cycles(1000)
+    for _ in range(8):
+        cycles(1000)
+    last = cycles(1000)
+    assert dict(os.environ) == environ
+    assert sys.path == syspath
+    # the cost of a cycle does not grow with the number of cycles
+    assert last < first * 3
+
+
+def test__Session__reopen(tmp_path, fake_grass):
+    grass_create(fake_grass.grassbin, tmp_path / "loc", "XY")
+    environ, syspath = dict(os.environ), list(sys.path)
+    sess = Session()
+    for _ in range(3):
+        sess.open(str(tmp_path), "loc")
+        assert os.environ["GISBASE"] == fake_grass.gisbase
+        sess.close()
+        assert dict(os.environ) == environ
+    assert sys.path == syspath
+
+
+def test__Session__close_twice(tmp_path, fake_grass, monkeypatch):
+    grass_create(fake_grass.grassbin, tmp_path / "loc", "XY")
+    gisrc = tmp_path / "rc"
+    gisrc.write_text(u"MAPSET: user\n")
+    monkeypatch.setenv("GISRC", str(gisrc))
+    monkeypatch.delenv("GIS_LOCK", raising=False)
+    environ = dict(os.environ)
+    sess = Session()
+    sess.open(str(tmp_path), "loc")
+    sess.close()
+    sess.close()
+    # the gisrc of the caller is restored and never removed
+    assert gisrc.exists()
+    assert dict(os.environ) == environ
+
+
+def test__Session__close_out_of_order(tmp_path, fake_grass, monkeypatch):
+    grass_create(fake_grass.grassbin, tmp_path / "loc", "XY")
+    monkeypatch.delenv("GISRC", raising=False)
+    monkeypatch.delenv("GIS_LOCK", raising=False)
+    environ = dict(os.environ)
+    first, second = Session(), Session()
+    first.open(str(tmp_path), "loc")
+    first_gisrc = os.environ["GISRC"]
+    second.open(str(tmp_path), "loc")
+    second_gisrc = os.environ["GISRC"]
+    gisbase = os.environ["GISBASE"]
+    first.close()
+    assert not os.path.exists(first_gisrc)
+    assert os.path.exists(second_gisrc)
+    # the environment of the second session is still active
+    assert os.environ["GISRC"] == second_gisrc
+    assert os.environ["GISBASE"] == gisbase
+    assert os.environ["GIS_LOCK"] == str(os.getpid())
+    second.close()
+    assert not os.path.exists(second_gisrc)
+    # the environment is restored as it was before the first session
+    assert dict(os.environ) == environ
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+import os
+
+from grass_session import grass_create
+from grass_session.executor import create_mapsets, map_over_mapsets
+
+
+def mapset_of(item):
+    with open(os.environ["GISRC"]) as rc:
+        gisenv = dict(line.split(": ", 1) for line in rc.read().splitlines())
+    return item, gisenv["MAPSET"], os.environ["GIS_LOCK"], os.getpid()
+
+
+def test__map_over_mapsets(tmp_path, fake_grass):
+    grass_create(fake_grass.grassbin, tmp_path / "loc", "XY")
+    environ = dict(os.environ)
+
+    results = map_over_mapsets(
+        mapset_of, range(20), gisdb=str(tmp_path), location="loc", workers=3
+    )
+    assert [res[0] for res in results] == list(range(20))
+    # each worker has its own mapset
+    workers = {res[3]: res[1] for res in results}
+    assert len(set(workers.values())) == len(workers)
+    assert all(res[2] == str(res[3]) for res in results)
+    # the temporary mapsets are removed
+    assert os.listdir(str(tmp_path / "loc")) == ["PERMANENT"]
+    assert dict(os.environ) == environ
+
+
+def test__create_mapsets(tmp_path, fake_grass):
+    grass_create(fake_grass.grassbin, tmp_path / "loc", "XY")
+    names = ["m{:03d}".format(i) for i in range(50)]
+    result = create_mapsets(str(tmp_path), "loc", names + ["PERMANENT", "a/b"])
+    assert (result["created"], result["failed"]) == (50, 1)
+    assert result["status"]["PERMANENT"] == "exists"
+    assert result["status"]["a/b"] == "invalid mapset name"
+    assert result["throughput"] > 0
+    for name in names:
+        assert os.path.isfile(str(tmp_path / "loc" / name / "WIND"))
+    # the launcher is not executed
+    assert len(fake_grass.calls()) == 1
+
+    result = create_mapsets(str(tmp_path), "loc", ["l1", "l2"], native=False)
+    assert result["created"] == 2
+    assert len(fake_grass.calls()) == 3
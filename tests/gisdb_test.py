@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+from grass_session import GisDB, Session, create_mapset
+
+
+@pytest.fixture(scope="function")
+def gisdb(tmp_path, fake_grass):
+    with Session(gisdb=str(tmp_path), location="xy", create_opts="XY"):
+        pass
+    with Session(gisdb=str(tmp_path), location="laea", create_opts="EPSG:3035"):
+        pass
+    create_mapset(str(tmp_path / "laea" / "user"))
+    os.mkdir(str(tmp_path / "other"))
+    return GisDB(tmp_path)
+
+
+def test__GisDB(gisdb):
+    assert gisdb.locations() == ["laea", "xy"]
+    assert gisdb.mapsets("laea") == ["PERMANENT", "user"]
+    assert gisdb.exists("laea", "user")
+    assert not gisdb.exists("other")
+    assert gisdb.validate("xy") == os.path.join(gisdb.path, "xy", "PERMANENT")
+    with pytest.raises(RuntimeError, match="Mapset missing"):
+        gisdb.validate("xy", "missing")
+    with pytest.raises(RuntimeError, match="Location missing"):
+        gisdb.mapsets("missing")
+    assert gisdb.projection("xy") == {}
+    assert gisdb.projection("laea")["PROJ_EPSG"] == {"epsg": "3035"}
+
+    # the unchanged directories are not scanned again
+    scans = gisdb.scans
+    gisdb.refresh()
+    assert gisdb.mapsets("laea") == ["PERMANENT", "user"]
+    assert gisdb.scans == scans
+
+    # a directory becomes a mapset when the WIND file is written
+    os.mkdir(os.path.join(gisdb.path, "xy", "new"))
+    assert gisdb.mapsets("xy") == ["PERMANENT"]
+    with open(os.path.join(gisdb.path, "xy", "PERMANENT", "DEFAULT_WIND")) as fl:
+        wind = fl.read()
+    with open(os.path.join(gisdb.path, "xy", "new", "WIND"), "w") as fl:
+        fl.write(wind)
+    assert gisdb.mapsets("xy") == ["PERMANENT", "new"]
+
+
+class _Py2Stat(object):
+    def __init__(self, st):
+        self.st_mode, self.st_mtime = st.st_mode, st.st_mtime
+
+
+def test__GisDB__python2_fallbacks(gisdb, monkeypatch):
+    # os.scandir and st_mtime_ns are missing on python 2
+    monkeypatch.delattr(os, "scandir")
+    stat = os.stat
+    monkeypatch.setattr(os, "stat", lambda *args, **kw: _Py2Stat(stat(*args, **kw)))
+    assert gisdb.locations() == ["laea", "xy"]
+    assert gisdb.mapsets("laea") == ["PERMANENT", "user"]
+    gisdb.refresh()
+    scans = gisdb.scans
+    gisdb.refresh()
+    assert gisdb.scans == scans
+
+
+def test__Session__open_gisdb(gisdb):
+    with Session(gisdb=gisdb, location="laea", mapset="user", isolated=True) as sess:
+        assert sess.gisdb == gisdb.path
+        assert sess.read_command("g.gisenv", get="MAPSET") == "user\n"
+    sess = Session(isolated=True)
+    with pytest.raises(RuntimeError, match="Mapset missing"):
+        sess.open(gisdb, "laea", "missing")
+    assert "GISRC" not in sess.env
+    with Session(
+        gisdb=gisdb, location="laea", mapset="new", create_opts="", isolated=True
+    ):
+        assert gisdb.mapsets("laea") == ["PERMANENT", "new", "user"]
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from grass_session import Session, make_command
+
+
+def test__make_command():
+    assert make_command("g.region", flags="p", raster=["a", "b"], res=10) == [
+        "g.region",
+        "-p",
+        "raster=a,b",
+        "res=10",
+    ]
+    assert make_command(
+        "r.mapcalc", overwrite=True, quiet=True, expression="a=1", region=None
+    ) == ["r.mapcalc", "--o", "--q", "expression=a=1"]
+    assert make_command("r.resamp.filter", lambda_=3) == ["r.resamp.filter", "lambda=3"]
+
+
+def test__Session__isolated(tmp_path, fake_grass):
+    mapsets = ["m{}".format(i) for i in range(8)]
+    for mapset in mapsets:
+        (tmp_path / "gisdb" / "loc" / mapset).mkdir(parents=True)
+    environ, syspath = dict(os.environ), list(sys.path)
+
+    def info(mapset):
+        with Session(
+            gisdb=str(tmp_path / "gisdb"), location="loc", mapset=mapset, isolated=True
+        ) as sess:
+            assert sess.env is not os.environ
+            assert sess.env["GISBASE"] == fake_grass.gisbase
+            assert sys.path == syspath
+            sess.run_command("g.gisenv")
+            return sess.read_command("g.gisenv", get="MAPSET").strip()
+
+    with ThreadPoolExecutor(4) as executor:
+        assert list(executor.map(info, mapsets * 4)) == mapsets * 4
+    assert dict(os.environ) == environ
+
+
+def test__Session__read_command__error(tmp_path, fake_grass):
+    (tmp_path / "loc" / "PERMANENT").mkdir(parents=True)
+    with Session(gisdb=str(tmp_path), location="loc", isolated=True) as sess:
+        with pytest.raises(RuntimeError):
+            sess.read_command("g.gisenv", get="UNKNOWN")
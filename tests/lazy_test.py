@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPT = """
+import os
+import grass_session
+print("GISBASE" in os.environ)
+{extra}
+"""
+
+
+def __run(fake_grass, extra="", lazy="1"):
+    env = dict(os.environ)
+    env.update(
+        GRASSBIN=fake_grass.grassbin,
+        GRASS_SESSION_LAZY=lazy,
+        PYTHONPATH=ROOT,
+    )
+    env.pop("GISBASE", None)
+    out = subprocess.check_output(
+        [sys.executable, "-c", SCRIPT.format(extra=extra)], env=env
+    )
+    return out.decode().split(), fake_grass.calls()
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason="requires python3.7 or higher")
+def test__import__lazy(fake_grass):
+    out, calls = __run(fake_grass)
+    assert out == ["False"]
+    assert calls == []
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason="requires python3.7 or higher")
+def test__import__lazy__resolve_on_demand(fake_grass):
+    out, calls = __run(
+        fake_grass,
+        extra=(
+            "print(grass_session.GISBASE)\nprint(grass_session.GRASSBIN)\n"
+            "print('GISBASE' in os.environ)"
+        ),
+    )
+    # reading the values does not set up the environment
+    assert out == ["False", fake_grass.gisbase, fake_grass.grassbin, "False"]
+    assert calls == ["--config path"]
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason="requires python3.7 or higher")
+def test__import__lazy__submodules(fake_grass):
+    out, _ = __run(
+        fake_grass,
+        extra=(
+            "import sys\n"
+            "names = ('grass_session.pool', 'grass_session.registry', "
+            "'grass_session.gisdb')\n"
+            "print(sorted(name for name in names if name in sys.modules))\n"
+            "print(grass_session.SessionPool.__module__)"
+        ),
+    )
+    assert out == ["False", "[]", "grass_session.pool"]
+
+
+def test__import__eager(fake_grass):
+    out, calls = __run(fake_grass, lazy="0")
+    assert out == ["True"]
+    assert calls == ["--config path"]
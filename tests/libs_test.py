@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+import os
+import subprocess
+import sys
+
+import pytest
+from grass_session import cache, libs
+
+try:
+    from shutil import which
+except ImportError:
+    which = None
+
+pytestmark = pytest.mark.skipif(
+    not sys.platform.startswith("linux") or which is None or not which("cc"),
+    reason="requires linux and a C compiler",
+)
+
+
+def __compile(path, source, soname, *deps):
+    src = str(path) + ".c"
+    with open(src, "w") as csrc:
+        csrc.write(source)
+    cmd = ["cc", "-shared", "-fPIC", "-Wl,-soname," + soname, "-o", str(path), src]
+    cmd.extend(deps)
+    subprocess.check_call(cmd)
+    os.remove(src)
+
+
+@pytest.fixture(scope="function")
+def gisbase(tmp_path):
+    lib = tmp_path / "gisbase" / "lib"
+    lib.mkdir(parents=True)
+    # the dependency is sorted after the library that needs it
+    __compile(lib / "libgrass_z.so", "int z(void) { return 1; }", "libgrass_z.so")
+    __compile(
+        lib / "libgrass_a.so",
+        "int z(void); int a(void) { return z(); }",
+        "libgrass_a.so",
+        "-L" + str(lib),
+        "-lgrass_z",
+    )
+    return str(tmp_path / "gisbase")
+
+
+def test__elf_dynamic(gisbase):
+    soname, needed = libs.elf_dynamic(os.path.join(gisbase, "lib", "libgrass_a.so"))
+    assert soname == "libgrass_a.so"
+    assert "libgrass_z.so" in needed
+    with open(os.path.join(gisbase, "lib", "text.txt"), "w") as txt:
+        txt.write("not an ELF file")
+    assert libs.elf_dynamic(os.path.join(gisbase, "lib", "text.txt")) is None
+
+
+def test__load_libs(gisbase, monkeypatch):
+    monkeypatch.setattr(libs, "_LOADED", {})
+    liba = os.path.join(gisbase, "lib", "libgrass_a.so")
+    libz = os.path.join(gisbase, "lib", "libgrass_z.so")
+    assert libs.load_order([liba, libz]) == [libz, liba]
+
+    timings = libs.load_libs(gisbase)
+    assert sorted(timings) == [liba, libz]
+    assert cache.read_json(libs.LIBS_CACHE)[gisbase]["order"] == [libz, liba]
+    # the libraries are loaded only once
+    assert libs.load_libs(gisbase) is timings
+
+
+def test__load_libs__missing(tmp_path, monkeypatch):
+    monkeypatch.setattr(libs, "_LOADED", {})
+    (tmp_path / "lib").mkdir()
+    with pytest.raises(RuntimeError):
+        libs.load_libs(str(tmp_path))
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+import os
+import subprocess
+import sys
+
+import pytest
+from grass_session import MapsetLock, MapsetLockError, Session
+from grass_session.lock import LOCK, READERS
+
+
+def dead_pid():
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+@pytest.fixture(scope="function")
+def mapset(tmp_path):
+    path = tmp_path / "mapset"
+    path.mkdir()
+    return str(path)
+
+
+def test__MapsetLock__exclusive(mapset):
+    lock = MapsetLock(mapset)
+    assert lock.acquire(blocking=False)
+    with open(os.path.join(mapset, LOCK)) as fl:
+        assert int(fl.read()) == os.getpid()
+    other = MapsetLock(mapset, pid=os.getppid())
+    assert not other.acquire(blocking=False)
+    assert not other.acquire(timeout=0.1)
+    assert not MapsetLock(mapset, shared=True).acquire(blocking=False)
+    lock.release()
+    assert not os.path.exists(os.path.join(mapset, LOCK))
+    with pytest.raises(MapsetLockError):
+        lock.release()
+
+
+def test__MapsetLock__shared(mapset):
+    readers = [MapsetLock(mapset, shared=True) for _ in range(3)]
+    assert all(reader.acquire(blocking=False) for reader in readers)
+    assert len(os.listdir(os.path.join(mapset, READERS))) == 3
+    # the writer waits for the readers
+    writer = MapsetLock(mapset)
+    assert not writer.acquire(timeout=0.1)
+    assert not os.path.exists(os.path.join(mapset, LOCK))
+    for reader in readers:
+        reader.release()
+    assert writer.acquire(blocking=False)
+    writer.release()
+
+
+def test__MapsetLock__stale(mapset):
+    pid = dead_pid()
+    with open(os.path.join(mapset, LOCK), "w") as fl:
+        fl.write("{}\n".format(pid))
+    os.mkdir(os.path.join(mapset, READERS))
+    with open(os.path.join(mapset, READERS, "reader"), "w") as fl:
+        fl.write("{}\n".format(pid))
+    with MapsetLock(mapset) as lock:
+        assert lock.locked
+        assert os.listdir(os.path.join(mapset, READERS)) == []
+
+
+def test__Session__open_lock(tmp_path, fake_grass):
+    opts = dict(gisdb=str(tmp_path), location="loc", isolated=True)
+    with Session(create_opts="XY", lock="shared", **opts) as sess:
+        assert sess.lock.shared and sess.lock.locked
+        with Session(lock="shared", **opts):
+            pass
+        with pytest.raises(MapsetLockError):
+            with Session(lock=True, lock_timeout=0.1, **opts):
+                pass
+    assert sess.lock is None
+    with Session(lock="exclusive", **opts) as sess:
+        assert os.path.exists(os.path.join(str(tmp_path), "loc", "PERMANENT", LOCK))
+    assert not os.path.exists(os.path.join(str(tmp_path), "loc", "PERMANENT", LOCK))
+
+
+def test__Session__open_lock_failure(tmp_path, fake_grass):
+    opts = dict(gisdb=str(tmp_path), location="loc", isolated=True)
+    with Session(create_opts="XY", **opts):
+        pass
+    sess = Session(isolated=True)
+    # grass_init fails without the GRASS paths
+    with pytest.raises(RuntimeError):
+        sess.open(str(tmp_path), "loc", env={}, lock=True)
+    assert sess.lock is None
+    assert not os.path.exists(os.path.join(str(tmp_path), "loc", "PERMANENT", LOCK))
+    sess.close()
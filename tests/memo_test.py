@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+
+import pytest
+from grass_session.memo import is_query
+
+
+@pytest.fixture(scope="function")
+def sess(fake_session):
+    return fake_session(create_opts="EPSG:3035", memoize=True)
+
+
+def test__is_query():
+    assert is_query("g.region", flags="g")
+    assert not is_query("g.region", flags="g", raster="elevation")
+    assert not is_query("g.region", flags="d")
+    assert is_query("g.proj", flags="g")
+    assert not is_query("g.proj", flags="c", epsg=4326)
+    assert is_query("g.gisenv", get="MAPSET")
+    assert not is_query("g.gisenv", set="MAPSET=user")
+    assert is_query("r.info", flags="g", map="elevation")
+    assert not is_query("r.mapcalc", expression="a = 1")
+
+
+def test__Session__memoize(sess):
+    region = sess.read_command("g.region", flags="g")
+    proj = sess.read_command("g.proj", flags="g")
+    for _ in range(10):
+        assert sess.read_command("g.region", flags="g") == region
+        assert sess.read_command("g.proj", flags="g") == proj
+    assert sess.memo.stats() == {"hits": 20, "misses": 2, "bypassed": 0, "size": 2}
+
+    # the region file is modified
+    wind = os.path.join(sess.gisdb, sess.location, sess.mapset, "WIND")
+    with open(wind) as fl:
+        content = fl.read()
+    time.sleep(0.01)
+    with open(wind, "w") as fl:
+        fl.write(content.replace("rows:       10", "rows:       20"))
+    assert "rows=20" in sess.read_command("g.region", flags="g").split()
+    assert sess.memo.stats()["misses"] == 3
+
+    # the region of the environment is part of the key
+    env = dict(sess.env, GRASS_REGION="north: 1;south: 0")
+    sess.read_command("g.region", flags="g", env=env)
+    assert sess.memo.stats()["misses"] == 4
+
+
+def test__Session__memoize__raster(sess):
+    np = pytest.importorskip("numpy")
+    sess.write_raster(np.zeros((10, 10), dtype="int32"), "elev")
+    info = sess.read_command("r.info", flags="g", map="elev")
+    assert "datatype=CELL" in info.split()
+    assert sess.read_command("r.info", flags="g", map="elev") == info
+    hits = sess.memo.stats()["hits"]
+    assert hits == 1
+
+    # the map is replaced without the session
+    header = os.path.join(sess.gisdb, sess.location, sess.mapset, "cellhd", "elev")
+    with open(header) as fl:
+        content = fl.read()
+    time.sleep(0.01)
+    with open(header, "w") as fl:
+        fl.write(content.replace("CELL", "DCELL"))
+    assert "datatype=DCELL" in sess.read_command("r.info", flags="g", map="elev")
+    assert sess.memo.stats()["hits"] == hits
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+from grass_session import TmpSession
+
+
+@pytest.fixture(scope="function")
+def base(tmp_path, fake_grass):
+    base = tmp_path / "gisdb" / "base"
+    for mapset in ("PERMANENT", "user"):
+        (base / mapset / "cellhd").mkdir(parents=True)
+        (base / mapset / "cellhd" / "elevation").write_text("rows: 10\n")
+    (base / "PERMANENT" / "DEFAULT_WIND").write_text("rows: 10\ncols: 10\n")
+    return base
+
+
+def test__TmpSession__overlay(tmp_path, base):
+    scratch = tmp_path / "scratch"
+    scratch.mkdir()
+    with TmpSession(
+        gisdb=str(scratch), location="loc", overlay=str(base), isolated=True
+    ) as sess:
+        path = scratch / "loc"
+        assert sess.mapset == "scratch"
+        assert sorted(os.listdir(str(path))) == ["PERMANENT", "scratch", "user"]
+        assert os.path.islink(str(path / "PERMANENT"))
+        assert (path / "user" / "cellhd" / "elevation").read_text() == "rows: 10\n"
+        assert (path / "scratch" / "WIND").read_text() == "rows: 10\ncols: 10\n"
+        (path / "scratch" / "cellhd").mkdir()
+        (path / "scratch" / "cellhd" / "result").write_text("rows: 10\n")
+        with open(sess.env["GISRC"]) as rc:
+            assert "MAPSET: scratch" in rc.read()
+
+    assert not os.path.exists(str(scratch / "loc"))
+    # the base location is not modified
+    assert sorted(os.listdir(str(base))) == ["PERMANENT", "user"]
+    assert (base / "user" / "cellhd" / "elevation").read_text() == "rows: 10\n"
+
+
+def test__TmpSession__overlay__errors(tmp_path, base):
+    sess = TmpSession(isolated=True)
+    with pytest.raises(ValueError):
+        sess.open(str(tmp_path), "loc", mapset="user", overlay=str(base))
+    with pytest.raises(RuntimeError):
+        sess.open(str(tmp_path), "loc", overlay=str(tmp_path / "missing"))
+    assert not os.path.exists(str(tmp_path / "loc"))
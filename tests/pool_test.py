@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+from grass_session import MapsetLock, MapsetLockError, SessionPool
+
+
+@pytest.fixture(scope="function")
+def gisdb(tmp_path, fake_grass):
+    for mapset in ("PERMANENT", "a", "b", "c"):
+        (tmp_path / "gisdb" / "loc" / mapset).mkdir(parents=True)
+    return str(tmp_path / "gisdb")
+
+
+def test__SessionPool__checkout_checkin(gisdb):
+    environ = dict(os.environ)
+    pool = SessionPool(maxsize=2)
+    sess = pool.checkout(gisdb, "loc", "a")
+    gisrc = sess.env["GISRC"]
+    with open(gisrc) as rc:
+        assert "MAPSET: a" in rc.read()
+    sess.env["GRASS_OVERWRITE"] = "1"
+    with open(gisrc, "w") as rc:
+        rc.write("GISDBASE: {}\nLOCATION_NAME: loc\nMAPSET: b\n".format(gisdb))
+    pool.checkin(sess)
+
+    # the same session is reused with a clean environment
+    with pool.session(gisdb, "loc", "a") as again:
+        assert again is sess
+        assert again.env["GISRC"] == gisrc
+        assert "GRASS_OVERWRITE" not in again.env
+        with open(gisrc) as rc:
+            assert "MAPSET: a" in rc.read()
+        # a busy mapset is opened in a new session
+        with pool.session(gisdb, "loc", "a") as other:
+            assert other is not sess
+            assert other.env["GISRC"] != gisrc
+    assert pool.stats() == dict(hits=1, misses=2, evictions=0, idle=2, busy=0)
+
+    # the least recently used sessions are closed
+    with pool.session(gisdb, "loc", "b"):
+        pass
+    with pool.session(gisdb, "loc", "c"):
+        pass
+    assert pool.stats() == dict(hits=1, misses=4, evictions=2, idle=2, busy=0)
+    assert not os.path.exists(gisrc)
+
+    pool.clear()
+    assert pool.stats()["idle"] == 0
+    # the process environment is never modified by the pool
+    assert dict(os.environ) == environ
+
+
+def test__SessionPool__checkin_unknown(gisdb):
+    pool = SessionPool()
+    with pytest.raises(ValueError):
+        pool.checkin(object())
+
+
+def test__SessionPool__checkout_error(gisdb, monkeypatch):
+    from grass_session import session
+
+    closed = []
+    close = session.Session.close
+
+    def spy_close(sess):
+        closed.append(sess)
+        close(sess)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("grass_init failed")
+
+    monkeypatch.setattr(session.Session, "close", spy_close)
+    monkeypatch.setattr(session, "grass_init", fail)
+    pool = SessionPool()
+    with pytest.raises(RuntimeError):
+        pool.checkout(gisdb, "loc", "a")
+    assert len(closed) == 1
+    assert pool.stats() == dict(hits=0, misses=1, evictions=0, idle=0, busy=0)
+
+
+def test__SessionPool__checkin_closed(gisdb):
+    pool = SessionPool()
+    with pool.session(gisdb, "loc", "a") as sess:
+        gisrc = sess.env["GISRC"]
+        sess.close()
+    # the closed session is dropped, its gisrc file is not written again
+    assert not os.path.exists(gisrc)
+    assert pool.stats() == dict(hits=0, misses=1, evictions=0, idle=0, busy=0)
+    with pool.session(gisdb, "loc", "a") as again:
+        assert again is not sess
+
+
+def test__SessionPool__lock(gisdb):
+    mapset = os.path.join(gisdb, "loc", "a")
+    pool = SessionPool(lock="exclusive", lock_timeout=0.1)
+    with pool.session(gisdb, "loc", "a") as sess:
+        assert sess.lock.locked
+        # the mapset is owned by the busy session
+        with pytest.raises(MapsetLockError):
+            pool.checkout(gisdb, "loc", "a")
+    # the lock is kept while the session is idle
+    assert sess.lock.locked
+    assert not MapsetLock(mapset).acquire(blocking=False)
+    with pool.session(gisdb, "loc", "a") as again:
+        assert again is sess
+    pool.clear()
+    assert sess.lock is None
+    lock = MapsetLock(mapset)
+    assert lock.acquire(blocking=False)
+    lock.release()
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pytest
+from grass_session.raster import format_region, parse_coordinate, parse_region
+
+np = pytest.importorskip("numpy")
+
+
+def test__parse_region():
+    region = parse_region("north: 45:30N;south: 10;rows: 3;proj: 3")
+    assert region["north"] == 45.5
+    assert region["rows"] == 3
+    assert parse_region(format_region(region)) == region
+    assert parse_coordinate("10:30W") == -10.5
+
+
+def test__Session__get_region(sess):
+    region = sess.get_region()
+    assert (region["rows"], region["cols"], region["north"]) == (10, 10, 10.0)
+
+
+def test__Session__write_read_raster(sess):
+    data = np.arange(100, dtype="float64").reshape(10, 10)
+    data[0, 0] = np.nan
+    sess.write_raster(data, "elev")
+    elev = sess.read_raster("elev")
+    assert isinstance(elev, np.memmap)
+    assert elev.dtype == np.float64
+    assert np.isnan(elev[0, 0])
+    np.testing.assert_array_equal(elev[1:], data[1:])
+
+    tmpdir = os.path.dirname(elev.filename)
+    assert os.listdir(tmpdir) == [os.path.basename(elev.filename)]
+
+    cells = np.arange(100, dtype="int32").reshape(10, 10)
+    sess.write_raster(cells, "cells", null=0)
+    cells = sess.read_raster("cells")
+    assert cells.dtype == np.int32
+    assert cells[0, 0] == np.iinfo(np.int32).min
+    assert cells[9, 9] == 99
+
+    # export a window of the map
+    region = dict(sess.get_region(), north=5.0, west=5.0, rows=5, cols=5)
+    window = sess.read_raster("elev", region=region)
+    np.testing.assert_array_equal(window, data[5:, 5:])
+    assert window.region is region
+
+    with pytest.raises(RuntimeError):
+        sess.write_raster(data, "elev")
+    with pytest.raises(ValueError):
+        sess.write_raster(data[:5], "small")
+
+    del elev, cells, window
+    sess.close()
+    assert not os.path.exists(tmpdir)
+
+
+@pytest.mark.parametrize("prefetch", [False, True])
+def test__Session__iter_tiles(sess, prefetch):
+    data = np.arange(100, dtype="float64").reshape(10, 10)
+    sess.write_raster(data, "elev")
+    tiles = []
+    for tile in sess.iter_tiles("elev", 4, 3, overlap=1, prefetch=prefetch):
+        top, left = tile.offset
+        np.testing.assert_array_equal(
+            tile, data[top:top + tile.shape[0], left:left + tile.shape[1]]
+        )
+        core = np.array(tile[tile.core])
+        tiles.append((top + tile.core[0].start, left + tile.core[1].start, core))
+    assert len(tiles) == 3 * 4
+    assert tiles[-1][2].shape == (2, 1)
+    result = np.zeros_like(data)
+    for row, col, core in tiles:
+        result[row:row + core.shape[0], col:col + core.shape[1]] = core
+    np.testing.assert_array_equal(result, data)
+    # the files of the tiles are removed
+    assert len(os.listdir(sess._tmpdir)) == 0
+
+    tiles = sess.iter_tiles("elev", 2, 2, prefetch=prefetch)
+    next(tiles)
+    tiles.close()
+    assert len(os.listdir(sess._tmpdir)) == 0
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+
+import pytest
+from grass_session.registry import GrassRegistry
+from grass_session.session import grass_env_diff, which
+from grass_session.testing import make_fake_grass
+
+
+@pytest.fixture(scope="function")
+def registry(tmp_path):
+    bindir = tmp_path / "bin"
+    bindir.mkdir()
+    for name in ("grass78", "grass83", "grass84"):
+        fake = make_fake_grass(tmp_path / name)
+        os.symlink(fake.grassbin, str(bindir / name))
+    (bindir / "grass-notalauncher").write_text("")
+    return GrassRegistry(path=str(bindir))
+
+
+def test__GrassRegistry(registry):
+    assert [inst.name for inst in registry.installations()] == [
+        "grass78",
+        "grass83",
+        "grass84",
+    ]
+    assert registry.get("78").name == "grass78"
+    assert registry.get("8").name == "grass84"
+    assert registry.get().name == "grass84"
+    with pytest.raises(RuntimeError):
+        registry.get("7.4")
+
+
+def test__GrassRegistry__activate(registry):
+    environ, syspath = dict(os.environ), list(sys.path)
+    grass78 = registry.activate("78")
+    assert os.environ["GISBASE"] == grass78.gisbase
+    assert os.environ["GRASSBIN"] == grass78.grassbin
+    assert os.path.join(grass78.gisbase, "bin") in os.environ["PATH"].split(os.pathsep)
+    assert sys.path[0] == os.path.join(grass78.gisbase, "etc", "python")
+
+    with registry.using("84") as grass84:
+        assert os.environ["GISBASE"] == grass84.gisbase
+        assert grass78.gisbase not in os.environ["PATH"]
+        assert os.path.join(grass78.gisbase, "etc", "python") not in sys.path
+    assert registry.active is grass78
+    assert os.environ["GISBASE"] == grass78.gisbase
+
+    registry.deactivate()
+    assert dict(os.environ) == environ
+    assert sys.path == syspath
+
+    # the installations are discovered and resolved only once
+    for _ in range(100):
+        registry.activate("83")
+        registry.activate("84")
+    registry.deactivate()
+    assert dict(os.environ) == environ
+    assert sys.path == syspath
+    calls = 0
+    for inst in registry.installations():
+        with open(os.path.join(os.path.dirname(inst.gisbase), "calls.log")) as log:
+            calls += len(log.read().splitlines())
+    assert calls == 3
+
+
+def test__GrassRegistry__activate_priority(registry):
+    grass78, grass84 = registry.get("78"), registry.get("84")
+    # GRASS 7.8 already set up, e.g. by the eager import of grass_session
+    default = grass_env_diff(gisbase=grass78.gisbase).apply(os.environ)
+    try:
+        assert which("g.region") == os.path.join(grass78.gisbase, "bin", "g.region")
+        registry.activate("84")
+        assert which("g.region") == os.path.join(grass84.gisbase, "bin", "g.region")
+        libs = os.environ["LD_LIBRARY_PATH"].split(os.pathsep)
+        assert libs[0] == os.path.join(grass84.gisbase, "lib")
+        assert os.path.join(grass78.gisbase, "lib") not in libs
+        registry.deactivate()
+        assert which("g.region") == os.path.join(grass78.gisbase, "bin", "g.region")
+    finally:
+        registry.deactivate()
+        default.restore()
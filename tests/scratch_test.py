@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+
+from grass_session import Session, grass_create
+
+G_TEMPFILE = r"""
+print(os.environ["TMPDIR"])
+print(os.environ["GRASS_TMPDIR_MAPSET"])
+"""
+
+
+def test__Session__scratch_dir(tmp_path, fake_grass):
+    fake_grass.add_module("g.tempfile", G_TEMPFILE)
+    grass_create(fake_grass.grassbin, tmp_path / "loc", "XY")
+    scratch = tmp_path / "shm"
+    with Session(
+        gisdb=str(tmp_path), location="loc", scratch_dir=scratch, isolated=True
+    ) as sess:
+        tmpdir = sess.get_tmpdir()
+        assert os.path.dirname(tmpdir) == str(scratch)
+        assert os.path.dirname(sess.env["GISRC"]) == tmpdir
+        assert sess.read_command("g.tempfile").split() == [tmpdir, "0"]
+        assert os.path.dirname(sess.mkstemp()) == tmpdir
+    assert os.listdir(str(scratch)) == []
+    assert "GRASS_TMPDIR_MAPSET" not in sess.env
+    assert "GISRC" not in sess.env
+
+
+def test__Session__scratch_dir_fallback(tmp_path, fake_grass):
+    grass_create(fake_grass.grassbin, tmp_path / "loc", "XY")
+    environ = dict(os.environ)
+    scratch = [str(tmp_path / "full"), str(tmp_path / "shm")]
+    with Session(
+        gisdb=str(tmp_path),
+        location="loc",
+        scratch_dir=scratch,
+        scratch_min_free=2 ** 60,
+    ) as sess:
+        assert os.path.dirname(sess.get_tmpdir()) == tempfile.gettempdir()
+        assert os.environ["TMPDIR"] == sess.get_tmpdir()
+    assert dict(os.environ) == environ
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+import time
+
+import pytest
+
+R_STATS = r"""
+import time
+
+for i in range(int(OPTIONS["count"])):
+    sys.stdout.write("{} {}\n".format(i, "è" * (i % 3)))
+sys.stdout.flush()
+if "sleep" in OPTIONS:
+    time.sleep(float(OPTIONS["sleep"]))
+if "fail" in FLAGS:
+    sys.stderr.write("ERROR: raster map not found\n")
+    sys.exit(1)
+"""
+
+
+@pytest.fixture(scope="function")
+def sess(fake_grass, fake_session):
+    fake_grass.add_module("r.stats", R_STATS)
+    return fake_session()
+
+
+def test__Session__stream_command(sess):
+    lines = list(sess.stream_command("r.stats", count=1000))
+    assert len(lines) == 1000
+    assert lines[5] == "5 èè\n"
+
+    chunks = list(sess.stream_command("r.stats", count=1000, chunk_size=7))
+    assert "".join(chunks) == "".join(lines)
+    # a character can be completed by the following block
+    assert all(len(chunk.encode("utf-8")) < 7 + 2 for chunk in chunks)
+
+
+def test__Session__stream_command__close(sess):
+    stream = sess.stream_command("r.stats", count=10, sleep=30)
+    assert next(stream) == "0 \n"
+    start = time.time()
+    stream.close()
+    # the module is killed
+    assert time.time() - start < 10
+
+
+def test__Session__stream_command__error(sess):
+    with pytest.raises(RuntimeError) as exc:
+        for _ in sess.stream_command("r.stats", count=3, flags="fail"):
+            pass
+    assert "raster map not found" in str(exc.value)
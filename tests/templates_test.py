@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+import os
+
+from grass_session import LocationTemplates, TmpSession
+
+
+def __creations(fake_grass):
+    return [call for call in fake_grass.calls() if call.startswith("-c")]
+
+
+def test__LocationTemplates__TmpSession(tmp_path, fake_grass):
+    templates = LocationTemplates(path=tmp_path / "templates")
+    for _ in range(3):
+        with TmpSession(
+            gisdb=str(tmp_path),
+            location="loc",
+            create_opts="EPSG:3035",
+            templates=templates,
+            isolated=True,
+        ):
+            wind = tmp_path / "loc" / "PERMANENT" / "WIND"
+            assert "rows:       10" in wind.read_text()
+        assert not os.path.exists(str(tmp_path / "loc"))
+    assert len(__creations(fake_grass)) == 1
+    assert len(templates.templates()) == 1
+
+    # other options create a new template
+    templates.create(fake_grass.grassbin, tmp_path / "xy", "XY")
+    assert len(__creations(fake_grass)) == 2
+    assert len(templates.templates()) == 2
+
+
+def test__LocationTemplates__link_evict(tmp_path, fake_grass):
+    templates = LocationTemplates(path=tmp_path / "templates", link=True)
+    grassbin = fake_grass.grassbin
+    templates.create(grassbin, tmp_path / "a", "EPSG:3035")
+    template = templates.get(grassbin, "EPSG:3035")
+    wind = os.path.join("PERMANENT", "WIND")
+    assert os.path.samefile(
+        os.path.join(template, wind), str(tmp_path / "a" / wind)
+    )
+
+    # only the most recent template is kept
+    templates.max_size = 1
+    templates.create(grassbin, tmp_path / "b", "EPSG:4326")
+    assert len(templates.templates()) == 1
+    assert not os.path.exists(template)
+    assert os.path.exists(str(tmp_path / "a" / wind))
+
+    templates.clear()
+    assert templates.templates() == []
+
+
+def test__LocationTemplates__link_fallback(tmp_path, fake_grass, monkeypatch):
+    def link(src, dst):
+        raise OSError("Invalid cross-device link")
+
+    templates = LocationTemplates(path=tmp_path / "templates", link=True)
+    grassbin = fake_grass.grassbin
+    template = templates.get(grassbin, "EPSG:3035")
+    monkeypatch.setattr(os, "link", link)
+    # the files are copied when they cannot be linked
+    templates.create(grassbin, tmp_path / "a", "EPSG:3035")
+    wind = os.path.join("PERMANENT", "WIND")
+    assert os.path.exists(str(tmp_path / "a" / wind))
+    assert not os.path.samefile(
+        os.path.join(template, wind), str(tmp_path / "a" / wind)
+    )
+
+
+def test__LocationTemplates__env(tmp_path, fake_grass, monkeypatch):
+    from grass_session.templates import get_templates
+
+    assert get_templates() is None
+    monkeypatch.setenv("GRASS_SESSION_TEMPLATES", "1")
+    assert isinstance(get_templates(), LocationTemplates)
+    assert get_templates(False) is None
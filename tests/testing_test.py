@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+import os
+
+from grass_session import TmpSession, get_grass_gisbase, grass_create
+
+
+def test__fake_grass__lifecycle(tmp_path, fake_grass):
+    assert get_grass_gisbase() == fake_grass.gisbase
+    with TmpSession(
+        gisdb=str(tmp_path), location="loc", create_opts="EPSG:3035", isolated=True
+    ) as sess:
+        permanent = tmp_path / "loc" / "PERMANENT"
+        files = set(os.listdir(str(permanent)))
+        assert {"DEFAULT_WIND", "MYNAME", "PROJ_EPSG", "PROJ_INFO", "VAR"} <= files
+        assert (permanent / "PROJ_EPSG").read_text() == "epsg: 3035\n"
+        assert sess.read_command("g.gisenv", get="MAPSET") == "PERMANENT\n"
+        assert "init=EPSG:3035" in sess.read_command("g.proj", flags="g")
+        region = dict(
+            line.split("=") for line in sess.read_command("g.region").split()
+        )
+        assert region["rows"] == region["cols"] == "10"
+
+        with TmpSession(
+            gisdb=str(tmp_path),
+            location="loc",
+            mapset="user",
+            create_opts="",
+            isolated=True,
+        ) as user:
+            assert user.read_command("g.gisenv", get="MAPSET") == "user\n"
+    assert not os.path.exists(str(tmp_path / "loc"))
+    assert fake_grass.calls() == [
+        "--config path",
+        "-c EPSG:3035 -e {}".format(tmp_path / "loc"),
+    ]
+
+
+def test__fake_grass__launcher_mapset(tmp_path, fake_grass):
+    grass_create(fake_grass.grassbin, tmp_path / "loc", "XY")
+    grass_create(fake_grass.grassbin, tmp_path / "loc" / "user", "", native=False)
+    assert sorted(os.listdir(str(tmp_path / "loc" / "user"))) == [
+        "VAR",
+        "WIND",
+        "sqlite",
+    ]
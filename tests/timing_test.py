@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import logging
+
+from grass_session import Session, TmpSession, add_timing_hook, remove_timing_hook
+
+PHASES = [
+    "close",
+    "get_grass_bin",
+    "get_grass_gisbase",
+    "grass_create",
+    "set_grass_path_env",
+    "write_gisrc",
+]
+
+
+def test__Session__timings(tmp_path, fake_grass, caplog):
+    events = []
+
+    def hook(phase, seconds, subprocesses):
+        events.append((phase, subprocesses))
+
+    add_timing_hook(hook)
+    try:
+        with caplog.at_level(logging.DEBUG, logger="grass_session.timing"):
+            with TmpSession(
+                gisdb=str(tmp_path),
+                location="loc",
+                create_opts="XY",
+                isolated=True,
+                timings=True,
+            ) as sess:
+                pass
+    finally:
+        remove_timing_hook(hook)
+
+    assert sorted(sess.timings) == PHASES
+    assert all(stats["calls"] == 1 for stats in sess.timings.values())
+    assert all(stats["seconds"] >= 0 for stats in sess.timings.values())
+    assert sess.timings["get_grass_gisbase"]["subprocesses"] == 1
+    assert sess.timings["grass_create"]["subprocesses"] == 1
+    assert sess.timings["write_gisrc"]["subprocesses"] == 0
+    assert sorted(phase for phase, _ in events) == PHASES
+    assert {rec.phase for rec in caplog.records} == set(PHASES)
+
+
+def test__Session__timings__disabled(tmp_path, fake_grass, monkeypatch):
+    (tmp_path / "loc" / "PERMANENT").mkdir(parents=True)
+    with Session(gisdb=str(tmp_path), location="loc", isolated=True) as sess:
+        pass
+    assert sess.timings == {}
+
+    monkeypatch.setenv("GRASS_SESSION_TIMINGS", "1")
+    with Session(gisdb=str(tmp_path), location="loc", isolated=True) as sess:
+        pass
+    assert "write_gisrc" in sess.timings
+
+    # the explicit argument wins over the environmental variable
+    with Session(
+        gisdb=str(tmp_path), location="loc", isolated=True, timings=False
+    ) as sess:
+        pass
+    assert sess.timings == {}
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+import time
+
+import pytest
+from grass_session.worker import WorkerError
+
+
+def test__Session__worker(sess):
+    with sess.worker() as worker:
+        assert worker.call("os.getenv", "GISRC") == sess.env["GISRC"]
+        assert worker.call("os.getenv", "LD_LIBRARY_PATH") == sess.env[
+            "LD_LIBRARY_PATH"
+        ]
+        pid = worker.call("os.getpid")
+        # the output of the functions does not break the protocol
+        assert worker.call("builtins.print", "hello") is None
+        assert worker.call("os.path.join", "a", "b") == "a/b"
+        with pytest.raises(WorkerError) as err:
+            worker.call("os.listdir", "/nonexistent")
+        assert isinstance(err.value.exception, FileNotFoundError)
+        assert "No such file" in err.value.remote_traceback
+        with pytest.raises(WorkerError):
+            worker.call("grass_session.missing")
+        assert worker.call("os.getpid") == pid
+        assert worker.calls == 8
+    assert worker.closed
+    with pytest.raises(RuntimeError):
+        worker.call("os.getpid")
+
+
+def test__Session__worker__crash(sess):
+    with sess.worker() as worker:
+        with pytest.raises(RuntimeError, match="exited with code 3"):
+            worker.call("os._exit", 3)
+
+
+def test__Session__worker__close_timeout(sess):
+    worker = sess.worker()
+    # the worker hangs at exit and is killed when the timeout expires
+    worker.call("atexit.register", time.sleep, 60)
+    start = time.time()
+    worker.close(timeout=0.2)
+    assert time.time() - start < 30
+    assert worker.closed
+    assert worker.process.returncode < 0